@@ -0,0 +1,41 @@
+"""add_supplies_snapshots_table
+
+Revision ID: 3f9c2a7d1b84
+Revises: 6e180f1a2e24
+Create Date: 2025-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d1b84'
+down_revision: Union[str, None] = '6e180f1a2e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade database schema."""
+    op.create_table('supplies_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('api_key_hash', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'api_key_hash', name='uq_supplies_snapshot_user_key')
+    )
+    op.create_index(op.f('ix_supplies_snapshots_id'), 'supplies_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_supplies_snapshots_user_id'), 'supplies_snapshots', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade database schema."""
+    op.drop_index(op.f('ix_supplies_snapshots_user_id'), table_name='supplies_snapshots')
+    op.drop_index(op.f('ix_supplies_snapshots_id'), table_name='supplies_snapshots')
+    op.drop_table('supplies_snapshots')
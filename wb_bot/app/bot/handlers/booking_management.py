@@ -4,12 +4,13 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.state import StatesGroup
 from aiogram.filters import StateFilter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import asyncio
 
+from ..states import State
 from ...utils.logger import get_logger
 from ...utils.calendar_utils import TelegramCalendar, parse_calendar_callback
 from ...services.wb_supplies_api import WBSuppliesAPIClient
@@ -47,7 +48,7 @@ async def safe_edit_text(message, text, **kwargs):
                     await message.edit_text(clean_text, **kwargs_copy)
                 except Exception as e2:
                     logger.error(f"❌ Критическая ошибка отправки сообщения: {e2}")
-from ..keyboards.inline import back_to_main_menu_keyboard
+from ..keyboards.inline import back_to_main_menu_keyboard, SupplySelectCallback, encode_supply_id
 
 logger = get_logger(__name__)
 router = Router()
@@ -166,7 +167,7 @@ async def start_booking_process(callback: CallbackQuery, state: FSMContext):
             )],
             [InlineKeyboardButton(
                 text="⬅️ Назад",
-                callback_data=f"supply_select:{supply_id}"
+                callback_data=SupplySelectCallback(sid=encode_supply_id(supply_id)).pack()
             )]
         ])
     )
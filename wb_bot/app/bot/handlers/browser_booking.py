@@ -6,8 +6,9 @@ import asyncio
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.state import StatesGroup
 
+from ..states import State
 from ...services.browser_manager import browser_manager
 from ...utils.logger import get_logger
 
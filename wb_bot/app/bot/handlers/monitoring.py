@@ -25,7 +25,7 @@ from ..keyboards.inline import (
     get_confirmation_keyboard, SettingsCallback
 )
 from ..keyboards.calendar import (
-    get_date_range_calendar, handle_calendar_callback, CalendarCallback
+    get_date_range_calendar, handle_calendar_callback, CalendarCallback, CalendarFilter
 )
 from ..states import MonitoringStates
 
@@ -117,7 +117,7 @@ async def handle_warehouse_selection(message: Message, state: FSMContext):
 
 
 @router.callback_query(
-    CalendarCallback.filter(),
+    CalendarFilter(),
     StateFilter(MonitoringStates.waiting_for_date_range)
 )
 async def handle_date_selection(
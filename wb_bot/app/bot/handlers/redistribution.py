@@ -6,15 +6,21 @@
 """
 
 import asyncio
-from typing import Optional
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.state import StatesGroup
 from aiogram.filters.callback_data import CallbackData
 
+from ..states import State
 from ...utils.logger import get_logger
+from ...utils.redistribution_config import RedistributionConfig
+from ...utils.time_utils import get_minutes_until_next_window
 from ...services.database_service import db_service
 from ...services.browser_manager import BrowserManager
 from ...services.redistribution_service import get_redistribution_service
@@ -25,13 +31,59 @@ from ..keyboards.inline_redistribution import get_redistribution_menu, create_wa
 logger = get_logger(__name__)
 router = Router()
 
+# Фиксированный список складов назначения (id -> склад)
+DESTINATION_WAREHOUSES: Dict[str, Dict[str, str]] = {
+    warehouse["id"]: warehouse
+    for warehouse in (
+        {"id": "dest_1", "name": "Коледино"},
+        {"id": "dest_2", "name": "Казань"},
+        {"id": "dest_3", "name": "Электросталь"},
+        {"id": "dest_4", "name": "Санкт-Петербург Уткина Завод"},
+        {"id": "dest_5", "name": "Екатеринбург – Испытателей 14г"},
+        {"id": "dest_6", "name": "Тула"},
+        {"id": "dest_7", "name": "Невинномысск"},
+        {"id": "dest_8", "name": "Рязань (Тюшевское)"},
+        {"id": "dest_9", "name": "Котовск"},
+        {"id": "dest_10", "name": "Волгоград"},
+        {"id": "dest_11", "name": "Сарапул"},
+    )
+}
+
+# Статические клавиатуры - собираются один раз при импорте модуля
+_CANCEL_TO_REDIST_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="❌ Отмена", callback_data="redistribution_menu")]
+])
+_STOP_HUNT_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="❌ Остановить охоту", callback_data="redistribution_stop")]
+])
+
+# Классификация ошибок попытки охоты: один проход регулярного выражения
+# вместо цепочки проверок подстрок
+_ERR_CLASSIFIER = re.compile(
+    r"(?P<unavailable>недоступен в списке WB|Продолжаю поиск)"
+    r"|(?P<limit>лимит|исчерпан)"
+    r"|(?P<quantity>количества не найдено)",
+    re.IGNORECASE
+)
+_ERR_TYPES = {
+    "unavailable": ("📦", "Склад временно недоступен"),
+    "limit": ("⏰", "Дневной лимит исчерпан"),
+    "quantity": ("🔢", "Проблема с полем количества"),
+}
+_ERR_DEFAULT = ("❌", "Техническая ошибка")
+
+# Общий макет статуса охоты: заголовок, неизменная шапка охоты, изменяемый хвост
+_STATUS_TMPL = "{title}\n\n{header}{tail}"
+
+# Попыток подряд, которые повторяют только ввод количества в уже открытой
+# форме; затем форма переоткрывается целиком, чтобы увидеть свежие данные
+_MAX_QUANTITY_RESUMES = 1
+
 
 @router.callback_query(F.data == "redistrib_wait_31min")
 async def wait_31_minutes_retry(callback: CallbackQuery, state: FSMContext):
     """Обработка ожидания 31 минуты для повтора."""
     try:
-        import asyncio
-        
         user_id = callback.from_user.id
         state_data = await state.get_data()
         
@@ -136,9 +188,6 @@ async def wait_31_minutes_retry(callback: CallbackQuery, state: FSMContext):
 async def wait_for_time_window(callback: CallbackQuery, state: FSMContext):
     """Обработка ожидания временного окна."""
     try:
-        from ...utils.time_utils import get_minutes_until_next_window
-        import asyncio
-        
         user_id = callback.from_user.id
         minutes_wait = get_minutes_until_next_window()
         
@@ -194,6 +243,23 @@ async def safe_callback_answer(callback: CallbackQuery, text: str = None, show_a
         logger.debug(f"Не удалось отправить callback answer '{text}': {e}")
 
 
+# Через сколько секунд долгое нажатие получает ответ-прогресс. Итог, известный
+# раньше, уходит в callback.answer сам (ошибки - алертом): ответить можно один раз
+_PROGRESS_ANSWER_DELAY = 3.0
+
+
+async def _answer_progress_later(callback: CallbackQuery, text: str) -> None:
+    """Отвечает на callback текстом прогресса, если итог не пришел за _PROGRESS_ANSWER_DELAY."""
+    await asyncio.sleep(_PROGRESS_ANSWER_DELAY)
+    await safe_callback_answer(callback, text)
+
+
+async def _answer_outcome(callback: CallbackQuery, progress: asyncio.Task, text: str, show_alert: bool = False):
+    """Отвечает на callback итогом, если ответ-прогресс еще не ушел."""
+    if progress.cancel():
+        await safe_callback_answer(callback, text, show_alert=show_alert)
+
+
 # Глобальный браузер менеджер (будет инициализирован в main.py)
 browser_manager: Optional[BrowserManager] = None
 
@@ -203,6 +269,25 @@ def init_redistribution_handlers(bm: BrowserManager):
     browser_manager = bm
 
 
+async def _finish_hunt(user_id: int, state: FSMContext, send, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """
+    Завершает охоту за поставкой: закрывает браузер, очищает состояние
+    и отправляет итоговое сообщение.
+    
+    Args:
+        send: message.edit_text или message.answer для итогового текста
+    """
+    try:
+        logger.info(f"🔒 Завершаем охоту пользователя {user_id}. Закрываем браузер...")
+        await browser_manager.close_browser(user_id)
+        logger.info("✅ Браузер успешно закрыт")
+    except Exception as browser_error:
+        logger.warning(f"⚠️ Не удалось закрыть браузер: {browser_error}")
+    
+    await state.clear()
+    await send(text, parse_mode="HTML", reply_markup=reply_markup)
+
+
 class RedistributionStates(StatesGroup):
     """Состояния для процесса перераспределения."""
     waiting_for_article = State()  # Ожидание ввода артикула товара
@@ -213,6 +298,23 @@ class RedistributionStates(StatesGroup):
     waiting_for_retry = State()  # Ожидание повтора через 31 минуту
 
 
+@dataclass(slots=True)
+class HuntCtx:
+    """Данные охоты за поставкой, хранящиеся в FSM состоянии."""
+    article: Optional[str] = None
+    source_warehouse: Optional[Dict[str, Any]] = None
+    destination_warehouse: Optional[Dict[str, Any]] = None
+    destination_warehouses: List[Dict[str, Any]] = field(default_factory=list)
+    available_quantity: Optional[int] = None
+    quantity_text: Optional[str] = None
+    quantity: Optional[int] = None
+    
+    @classmethod
+    def from_state(cls, data: Dict[str, Any]) -> "HuntCtx":
+        """Создает контекст из данных FSM, игнорируя посторонние ключи."""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
 # Callback классы импортированы из keyboards.inline_redistribution
 
 class DestinationCallback(CallbackData, prefix="destination"):
@@ -225,15 +327,25 @@ class DestinationCallback(CallbackData, prefix="destination"):
 
 def create_destination_keyboard(warehouses: list, show_retry: bool = False) -> InlineKeyboardMarkup:
     """Создает клавиатуру с кнопками складов назначения."""
+    # Повторные запросы с тем же списком складов берут клавиатуру из кэша
+    return _build_destination_keyboard(
+        tuple((warehouse['id'], warehouse['name']) for warehouse in warehouses),
+        show_retry
+    )
+
+
+@lru_cache(maxsize=128)
+def _build_destination_keyboard(warehouses: tuple, show_retry: bool) -> InlineKeyboardMarkup:
+    """Собирает клавиатуру складов назначения по кортежу пар (id, name)."""
     keyboard = []
     
     # Добавляем кнопки складов назначения (по 1 в ряд для удобности)
-    for warehouse in warehouses:
+    for warehouse_id, warehouse_name in warehouses:
         warehouse_button = InlineKeyboardButton(
-            text=f"📦 {warehouse['name']}",
+            text=f"📦 {warehouse_name}",
             callback_data=DestinationCallback(
                 action="select",
-                warehouse_id=warehouse['id']
+                warehouse_id=warehouse_id
             ).pack()
         )
         keyboard.append([warehouse_button])
@@ -259,31 +371,6 @@ def create_destination_keyboard(warehouses: list, show_retry: bool = False) -> I
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_redistribution_menu() -> InlineKeyboardMarkup:
-    """Получить меню перераспределения остатков."""
-    keyboard = [
-        [
-            InlineKeyboardButton(
-                text="🚀 Открыть страницу перераспределения",
-                callback_data=RedistributionCallback(action="start").pack()
-            )
-        ],
-        [
-            InlineKeyboardButton(
-                text="📖 Инструкция",
-                callback_data=RedistributionCallback(action="help").pack()
-            )
-        ],
-        [
-            InlineKeyboardButton(
-                text="🏠 Главное меню",
-                callback_data="back_to_main"
-            )
-        ]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-
 def get_redistribution_progress_menu() -> InlineKeyboardMarkup:
     """Меню во время процесса перераспределения."""
     keyboard = [
@@ -389,16 +476,6 @@ async def request_article_input(callback: CallbackQuery, state: FSMContext):
         # Переводим пользователя в состояние ожидания артикула
         await state.set_state(RedistributionStates.waiting_for_article)
         
-        # Клавиатура для отмены
-        cancel_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="❌ Отмена",
-                    callback_data="redistribution_menu"
-                )
-            ]
-        ])
-        
         await callback.message.edit_text(
             "📦 <b>Введите артикул товара</b>\n\n"
             "🔤 Введите артикул товара WB для перераспределения.\n"
@@ -408,7 +485,7 @@ async def request_article_input(callback: CallbackQuery, state: FSMContext):
             "• Обычно 8-10 цифр\n"
             "• Без пробелов и символов",
             parse_mode="HTML",
-            reply_markup=cancel_keyboard
+            reply_markup=_CANCEL_TO_REDIST_KB
         )
         
         await callback.answer()
@@ -648,23 +725,9 @@ async def handle_warehouse_selection(callback: CallbackQuery, callback_data: War
             )
             
             # Используем фиксированный список складов для назначения
+            # без склада откуда
             destination_warehouses = [
-                {"id": "dest_1", "name": "Коледино"},
-                {"id": "dest_2", "name": "Казань"},
-                {"id": "dest_3", "name": "Электросталь"},
-                {"id": "dest_4", "name": "Санкт-Петербург Уткина Завод"},
-                {"id": "dest_5", "name": "Екатеринбург – Испытателей 14г"},
-                {"id": "dest_6", "name": "Тула"},
-                {"id": "dest_7", "name": "Невинномысск"},
-                {"id": "dest_8", "name": "Рязань (Тюшевское)"},
-                {"id": "dest_9", "name": "Котовск"},
-                {"id": "dest_10", "name": "Волгоград"},
-                {"id": "dest_11", "name": "Сарапул"}
-            ]
-            
-            # Фильтруем - убираем склад откуда
-            destination_warehouses = [
-                w for w in destination_warehouses 
+                w for w in DESTINATION_WAREHOUSES.values()
                 if w["name"] != selected_warehouse["name"]
             ]
             
@@ -796,6 +859,11 @@ async def show_redistribution_help(callback: CallbackQuery, callback_data: Redis
 @router.callback_query(DestinationCallback.filter(F.action == "select"))
 async def handle_destination_selection(callback: CallbackQuery, callback_data: DestinationCallback, state: FSMContext):
     """Обработка выбора склада назначения."""
+    # Работа в браузере занимает десятки секунд, а токен callback истекает раньше:
+    # если итог не готов за _PROGRESS_ANSWER_DELAY, подтверждаем нажатие прогрессом.
+    # Сообщение редактируется один раз, когда известен результат
+    progress = asyncio.create_task(_answer_progress_later(callback, "⏳ Выбираем склад назначения..."))
+    
     try:
         user_id = callback.from_user.id
         destination_warehouse_id = callback_data.warehouse_id
@@ -804,13 +872,11 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
         
         # Получаем данные из состояния
         state_data = await state.get_data()
-        article = state_data.get('article')
-        source_warehouse = state_data.get('source_warehouse')
-        destination_warehouses = state_data.get('destination_warehouses', [])
+        ctx = HuntCtx.from_state(state_data)
         
         # Находим выбранный склад назначения
         selected_destination = None
-        for warehouse in destination_warehouses:
+        for warehouse in ctx.destination_warehouses:
             if warehouse['id'] == destination_warehouse_id:
                 selected_destination = warehouse
                 break
@@ -823,67 +889,36 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
                 parse_mode="HTML",
                 reply_markup=get_redistribution_menu()
             )
-            await callback.answer("❌ Склад не найден", show_alert=True)
+            await _answer_outcome(callback, progress, "❌ Склад не найден", show_alert=True)
             await state.clear()
             return
         
-        # Показываем процесс выбора склада назначения
-        await callback.message.edit_text(
-            f"🎯 <b>Выбираем склад назначения</b>\n\n"
-            f"📦 Артикул: <code>{article}</code>\n"
-            f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
-            f"📦 Куда: <b>{selected_destination['name']}</b>\n\n"
-            f"⏳ Кликаем по складу назначения в браузере...",
-            parse_mode="HTML"
-        )
-        
         # Получаем сервис и выбираем склад назначения
         redistribution_service = get_redistribution_service(browser_manager)
         result = await redistribution_service.select_destination_warehouse(user_id, selected_destination)
         
         if result["success"]:
             # Склад назначения выбран успешно, теперь получаем количество товара
-            await callback.message.edit_text(
-                f"✅ <b>Склад назначения выбран!</b>\n\n"
-                f"📦 Артикул: <code>{article}</code>\n"
-                f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
-                f"📦 Куда: <b>{selected_destination['name']}</b>\n\n"
-                f"⏳ Получаем информацию о количестве товара...",
-                parse_mode="HTML"
-            )
-            
-            # Получаем количество товара
             quantity_result = await redistribution_service.get_available_quantity(user_id)
             
             if quantity_result["success"]:
                 quantity_text = quantity_result["quantity_text"]
                 quantity_number = quantity_result.get("quantity_number")
                 
-                # Сохраняем данные в состоянии для ввода количества
+                # Сохраняем данные в состоянии для ввода количества.
+                # Данные уже прочитаны в начале обработчика, поэтому пишем их
+                # целиком через set_data - update_data сделал бы лишний get_data
+                ctx.destination_warehouse = selected_destination
+                ctx.available_quantity = quantity_number
+                ctx.quantity_text = quantity_text
                 await state.set_state(RedistributionStates.waiting_for_quantity)
-                await state.update_data(
-                    article=article,
-                    source_warehouse=source_warehouse,
-                    destination_warehouse=selected_destination,
-                    available_quantity=quantity_number,
-                    quantity_text=quantity_text
-                )
-                
-                # Клавиатура для отмены
-                cancel_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="❌ Отмена",
-                            callback_data="redistribution_menu"
-                        )
-                    ]
-                ])
+                await state.set_data({**state_data, **asdict(ctx)})
                 
                 # Формируем сообщение с количеством
                 quantity_message = (
                     f"📊 <b>Информация о товаре</b>\n\n"
-                    f"📦 Артикул: <code>{article}</code>\n"
-                    f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
+                    f"📦 Артикул: <code>{ctx.article}</code>\n"
+                    f"🏪 Откуда: <b>{ctx.source_warehouse['name']}</b>\n"
                     f"📦 Куда: <b>{selected_destination['name']}</b>\n\n"
                     f"📊 <b>Доступно:</b> {quantity_text}\n\n"
                     f"🔢 <b>Какое количество хотите переместить?</b>\n\n"
@@ -896,21 +931,21 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
                 await callback.message.edit_text(
                     quantity_message,
                     parse_mode="HTML",
-                    reply_markup=cancel_keyboard
+                    reply_markup=_CANCEL_TO_REDIST_KB
                 )
-                await safe_callback_answer(callback, "✅ Введите количество")
+                await _answer_outcome(callback, progress, "✅ Введите количество")
             else:
                 await callback.message.edit_text(
                     f"⚠️ <b>Проблема с получением количества</b>\n\n"
-                    f"📦 Артикул: <code>{article}</code>\n"
-                    f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
+                    f"📦 Артикул: <code>{ctx.article}</code>\n"
+                    f"🏪 Откуда: <b>{ctx.source_warehouse['name']}</b>\n"
                     f"📦 Куда: <b>{selected_destination['name']}</b>\n\n"
                     f"❌ Ошибка: {quantity_result['error']}\n\n"
                     f"💡 Попробуйте завершить настройку вручную в браузере.",
                     parse_mode="HTML",
                     reply_markup=get_redistribution_menu()
                 )
-                await safe_callback_answer(callback, "⚠️ Ошибка получения количества", show_alert=True)
+                await _answer_outcome(callback, progress, "⚠️ Ошибка получения количества", show_alert=True)
                 await state.clear()
         
         elif result.get("need_retry"):
@@ -919,12 +954,12 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
             error_text = "\n".join(f"• {msg}" for msg in error_messages)
             
             # Показываем список складов снова для повторного выбора
-            destination_keyboard = create_destination_keyboard(destination_warehouses, show_retry=True)
+            destination_keyboard = create_destination_keyboard(ctx.destination_warehouses, show_retry=True)
             
             await callback.message.edit_text(
                 f"⚠️ <b>Ошибка при выборе склада назначения</b>\n\n"
-                f"📦 Артикул: <code>{article}</code>\n"
-                f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
+                f"📦 Артикул: <code>{ctx.article}</code>\n"
+                f"🏪 Откуда: <b>{ctx.source_warehouse['name']}</b>\n"
                 f"📦 Куда: <b>{selected_destination['name']}</b>\n\n"
                 f"🚨 <b>Ошибки:</b>\n{error_text}\n\n"
                 f"📸 Скриншот: {result.get('screenshot', 'Не создан')}\n\n"
@@ -932,20 +967,20 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
                 parse_mode="HTML",
                 reply_markup=destination_keyboard
             )
-            await callback.answer("⚠️ Попробуйте другой склад", show_alert=True)
+            await _answer_outcome(callback, progress, "⚠️ Попробуйте другой склад", show_alert=True)
         
         else:
             await callback.message.edit_text(
                 f"⚠️ <b>Проблема при выборе склада назначения</b>\n\n"
-                f"📦 Артикул: <code>{article}</code>\n"
-                f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
+                f"📦 Артикул: <code>{ctx.article}</code>\n"
+                f"🏪 Откуда: <b>{ctx.source_warehouse['name']}</b>\n"
                 f"📦 Куда: <b>{selected_destination['name']}</b>\n"
                 f"❌ Ошибка: {result['error']}\n\n"
                 f"💡 Попробуйте выбрать склад назначения вручную в браузере.",
                 parse_mode="HTML",
                 reply_markup=get_redistribution_menu()
             )
-            await callback.answer("⚠️ Ошибка выбора склада", show_alert=True)
+            await _answer_outcome(callback, progress, "⚠️ Ошибка выбора склада", show_alert=True)
             await state.clear()
         
     except Exception as e:
@@ -957,7 +992,7 @@ async def handle_destination_selection(callback: CallbackQuery, callback_data: D
             parse_mode="HTML",
             reply_markup=get_redistribution_menu()
         )
-        await callback.answer("❌ Ошибка", show_alert=True)
+        await _answer_outcome(callback, progress, "❌ Ошибка", show_alert=True)
         await state.clear()
 
 
@@ -1033,38 +1068,32 @@ async def retry_destination_warehouses(callback: CallbackQuery, callback_data: D
 async def start_redistribution_cycle(message: Message, state: FSMContext):
     """Запускает цикл попыток распределения в заданные периоды."""
     try:
-        import asyncio
-        from ...utils.redistribution_config import RedistributionConfig
-        
         user_id = message.from_user.id
-        state_data = await state.get_data()
-        
-        article = state_data.get('article')
-        source_warehouse = state_data.get('source_warehouse')
-        destination_warehouse = state_data.get('destination_warehouse')
-        quantity = state_data.get('quantity')
+        ctx = HuntCtx.from_state(await state.get_data())
+        
+        # Неизменная часть статуса - собирается один раз на всю охоту
+        header = (
+            f"📦 Артикул: <code>{ctx.article}</code>\n"
+            f"🏪 Откуда: <b>{ctx.source_warehouse['name']}</b>\n"
+            f"📦 Куда: <b>{ctx.destination_warehouse['name']}</b>\n"
+            f"🔢 Количество: <b>{ctx.quantity}</b> шт\n\n"
+        )
         
         # Показываем сообщение о начале процесса
         status_message = await message.answer(
-            f"🚀 <b>Запускаем охоту за поставкой!</b>\n\n"
-            f"📦 Артикул: <code>{article}</code>\n"
-            f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
-            f"📦 Куда: <b>{destination_warehouse['name']}</b>\n"
-            f"🔢 Количество: <b>{quantity}</b> шт\n\n"
-            f"⏰ Активные периоды: {', '.join([f'{s.hour:02d}:{s.minute:02d}-{e.hour:02d}:{e.minute:02d}' for s, e in RedistributionConfig.get_booking_periods()])} МСК\n"
-            f"🔥 В активные периоды: каждую <b>{RedistributionConfig.get_active_retry_minutes()} минуту</b>\n"
-            f"⏳ Вне периодов: каждые <b>{RedistributionConfig.get_retry_minutes()} минут</b>\n"
-            f"🔄 Максимум попыток: {RedistributionConfig.get_max_attempts()}\n\n"
-            f"🎯 Бот будет <b>умно</b> пытаться поймать поставку!",
+            _STATUS_TMPL.format(
+                title="🚀 <b>Запускаем охоту за поставкой!</b>",
+                header=header,
+                tail=(
+                    f"⏰ Активные периоды: {', '.join([f'{s.hour:02d}:{s.minute:02d}-{e.hour:02d}:{e.minute:02d}' for s, e in RedistributionConfig.get_booking_periods()])} МСК\n"
+                    f"🔥 В активные периоды: каждую <b>{RedistributionConfig.get_active_retry_minutes()} минуту</b>\n"
+                    f"⏳ Вне периодов: каждые <b>{RedistributionConfig.get_retry_minutes()} минут</b>\n"
+                    f"🔄 Максимум попыток: {RedistributionConfig.get_max_attempts()}\n\n"
+                    f"🎯 Бот будет <b>умно</b> пытаться поймать поставку!"
+                )
+            ),
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="❌ Остановить охоту",
-                        callback_data="redistribution_stop"
-                    )
-                ]
-            ])
+            reply_markup=_STOP_HUNT_KB
         )
         
         await state.set_state(RedistributionStates.processing_redistribution)
@@ -1074,6 +1103,11 @@ async def start_redistribution_cycle(message: Message, state: FSMContext):
         
         redistribution_service = get_redistribution_service(browser_manager, fast_mode=True)
         
+        # Склады уже выбраны в форме прошлой попыткой (упал только шаг количества)
+        form_ready = False
+        # Сколько попыток подряд начались с количества без переоткрытия формы
+        quantity_resumes = 0
+        
         while attempts < max_attempts:
             # Проверяем, не отменил ли пользователь
             current_state = await state.get_state()
@@ -1094,67 +1128,91 @@ async def start_redistribution_cycle(message: Message, state: FSMContext):
                 minutes_until_active = RedistributionConfig.minutes_until_next_period()
                 mode_text += f"\n⏰ До активного периода: {minutes_until_active} мин"
             
-            await status_message.edit_text(
-                f"🎯 <b>Попытка #{attempts}</b>\n\n"
-                f"📦 Артикул: <code>{article}</code>\n"
-                f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
-                f"📦 Куда: <b>{destination_warehouse['name']}</b>\n"
-                f"🔢 Количество: <b>{quantity}</b> шт\n\n"
-                f"{mode_text}\n\n"
-                f"⏳ Пробуем забронировать...",
-                parse_mode="HTML"
+            # Если форма со складами уцелела с прошлой попытки и браузер жив,
+            # повторяем только ввод количества без переоткрытия формы. Но не
+            # больше _MAX_QUANTITY_RESUMES раз подряд: иначе охота так и
+            # работала бы со страницей, загруженной много часов назад
+            resume_at_quantity = (
+                form_ready
+                and quantity_resumes < _MAX_QUANTITY_RESUMES
+                and browser_manager.is_browser_active(user_id)
             )
+            quantity_resumes = quantity_resumes + 1 if resume_at_quantity else 0
+            form_ready = False
+            
+            steps = [
+                status_message.edit_text(
+                    _STATUS_TMPL.format(
+                        title=f"🎯 <b>Попытка #{attempts}</b>",
+                        header=header,
+                        tail=f"{mode_text}\n\n⏳ Пробуем забронировать..."
+                    ),
+                    parse_mode="HTML"
+                )
+            ]
+            if not resume_at_quantity:
+                steps.append(redistribution_service.close_and_reopen_redistribution(user_id, ctx.article))
+            
+            # Статус в Telegram и переоткрытие формы в браузере независимы -
+            # выполняем параллельно, не дожидаясь ответа Telegram
+            status_result, *reopen_results = await asyncio.gather(*steps, return_exceptions=True)
+            
+            if isinstance(status_result, Exception):
+                logger.warning(f"⚠️ Не удалось обновить статус попытки #{attempts}: {status_result}")
             
             try:
-                # Переоткрываем форму
-                await redistribution_service.close_and_reopen_redistribution(user_id, article)
+                # Форма переоткрыта параллельно со статусом
+                for reopen_result in reopen_results:
+                    if isinstance(reopen_result, Exception):
+                        raise reopen_result
                 
-                # Выбираем склад откуда
-                select_result = await redistribution_service.select_warehouse(user_id, source_warehouse)
-                if not select_result["success"]:
-                    # Проверяем, нужно ли переоткрыть форму
-                    if select_result.get("warehouse_not_in_list"):
-                        # Склад отсутствует в списке - это нормально, продолжаем попытки
-                        raise Exception(f"📦 Склад '{source_warehouse['name']}' сейчас недоступен в списке WB. Продолжаю поиск...")
-                    else:
-                        raise Exception(f"Не удалось выбрать склад откуда: {select_result.get('error')}")
-                
-                # Выбираем склад куда
-                dest_result = await redistribution_service.select_destination_warehouse(user_id, destination_warehouse)
-                if not dest_result["success"]:
-                    if dest_result.get("warehouse_not_in_list"):
-                        # Склад назначения отсутствует в списке
-                        raise Exception(f"🏭 Склад назначения '{destination_warehouse['name']}' сейчас недоступен. Продолжаю поиск...")
-                    else:
-                        raise Exception(f"Не удалось выбрать склад куда: {dest_result.get('error')}")
+                if resume_at_quantity:
+                    logger.info(f"⏩ Склады уже выбраны, попытка #{attempts} начинается с ввода количества")
+                else:
+                    # Выбираем склад откуда
+                    select_result = await redistribution_service.select_warehouse(user_id, ctx.source_warehouse)
+                    if not select_result["success"]:
+                        # Проверяем, нужно ли переоткрыть форму
+                        if select_result.get("warehouse_not_in_list"):
+                            # Склад отсутствует в списке - это нормально, продолжаем попытки
+                            raise Exception(f"📦 Склад '{ctx.source_warehouse['name']}' сейчас недоступен в списке WB. Продолжаю поиск...")
+                        else:
+                            raise Exception(f"Не удалось выбрать склад откуда: {select_result.get('error')}")
+                    
+                    # Выбираем склад куда
+                    dest_result = await redistribution_service.select_destination_warehouse(user_id, ctx.destination_warehouse)
+                    if not dest_result["success"]:
+                        if dest_result.get("warehouse_not_in_list"):
+                            # Склад назначения отсутствует в списке
+                            raise Exception(f"🏭 Склад назначения '{ctx.destination_warehouse['name']}' сейчас недоступен. Продолжаю поиск...")
+                        else:
+                            raise Exception(f"Не удалось выбрать склад куда: {dest_result.get('error')}")
                 
                 # Вводим количество
-                input_result = await redistribution_service.input_quantity(user_id, quantity)
+                input_result = await redistribution_service.input_quantity(user_id, ctx.quantity)
                 
                 if input_result["success"] and input_result.get("redistribute_clicked"):
                     # УСПЕХ! Закрываем браузер
-                    try:
-                        logger.info("🎉 Поставка поймана! Закрываем браузер...")
-                        await browser_manager.close_browser(user_id)
-                        logger.info("✅ Браузер успешно закрыт")
-                    except Exception as browser_error:
-                        logger.warning(f"⚠️ Не удалось закрыть браузер: {browser_error}")
-                    
-                    await status_message.edit_text(
-                        f"🎉🎉🎉 <b>ПОСТАВКА ПОЙМАНА!</b> 🎉🎉🎉\n\n"
-                        f"📦 Артикул: <code>{article}</code>\n"
-                        f"🏪 Откуда: <b>{source_warehouse['name']}</b>\n"
-                        f"📦 Куда: <b>{destination_warehouse['name']}</b>\n"
-                        f"🔢 Количество: <b>{quantity}</b> шт\n\n"
-                        f"✅ <b>ВСЕ УСПЕШНО ЗАБРОНИРОВАНО!</b>\n"
-                        f"🎯 Попытка #{attempts} успешна!\n\n"
-                        f"😎 Можете кайфовать!",
-                        parse_mode="HTML",
-                        reply_markup=get_redistribution_menu()
+                    logger.info("🎉 Поставка поймана!")
+                    await _finish_hunt(
+                        user_id, state, status_message.edit_text,
+                        _STATUS_TMPL.format(
+                            title="🎉🎉🎉 <b>ПОСТАВКА ПОЙМАНА!</b> 🎉🎉🎉",
+                            header=header,
+                            tail=(
+                                f"✅ <b>ВСЕ УСПЕШНО ЗАБРОНИРОВАНО!</b>\n"
+                                f"🎯 Попытка #{attempts} успешна!\n\n"
+                                f"😎 Можете кайфовать!"
+                            )
+                        ),
+                        get_redistribution_menu()
                     )
-                    await state.clear()
                     return
                 else:
+                    # Количество введено, но кнопка не нажалась - склады в форме
+                    # остаются выбранными, следующая попытка начнется с количества.
+                    # Ошибка ввода считается сбросом формы - переоткрываем целиком
+                    form_ready = input_result["success"]
                     raise Exception(input_result.get('error', 'Не удалось забронировать'))
                     
             except Exception as e:
@@ -1162,79 +1220,53 @@ async def start_redistribution_cycle(message: Message, state: FSMContext):
                 logger.info(f"Попытка #{attempts} не удалась: {error_msg}")
                 
                 # Определяем тип ошибки для более понятного сообщения
-                if "недоступен в списке WB" in error_msg or "Продолжаю поиск" in error_msg:
-                    error_icon = "📦"
-                    error_type = "Склад временно недоступен"
-                elif "лимит" in error_msg.lower() or "исчерпан" in error_msg.lower():
-                    error_icon = "⏰"
-                    error_type = "Дневной лимит исчерпан"
-                elif "количества не найдено" in error_msg:
-                    error_icon = "🔢"
-                    error_type = "Проблема с полем количества"
-                else:
-                    error_icon = "❌"
-                    error_type = "Техническая ошибка"
+                error_match = _ERR_CLASSIFIER.search(error_msg)
+                error_icon, error_type = _ERR_TYPES[error_match.lastgroup] if error_match else _ERR_DEFAULT
                 
                 await status_message.edit_text(
-                    f"{error_icon} <b>Попытка #{attempts}: {error_type}</b>\n\n"
-                    f"📦 Артикул: <code>{article}</code>\n"
-                    f"🏪 Ищу: <b>{source_warehouse['name']}</b> → <b>{destination_warehouse['name']}</b>\n"
-                    f"🔢 Количество: <b>{quantity}</b> шт\n\n"
-                    f"💬 {error_msg}\n\n"
-                    f"{mode_text}\n"
-                    f"⏳ Следующая попытка через {current_retry_interval} минут...",
+                    _STATUS_TMPL.format(
+                        title=f"{error_icon} <b>Попытка #{attempts}: {error_type}</b>",
+                        header=header,
+                        tail=(
+                            f"💬 {error_msg}\n\n"
+                            f"{mode_text}\n"
+                            f"⏳ Следующая попытка через {current_retry_interval} минут..."
+                        )
+                    ),
                     parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                        [
-                            InlineKeyboardButton(
-                                text="❌ Остановить охоту",
-                                callback_data="redistribution_stop"
-                            )
-                        ]
-                    ])
+                    reply_markup=_STOP_HUNT_KB
                 )
             
             # Ждем перед следующей попыткой (динамический интервал)
             await asyncio.sleep(current_retry_interval * 60)
         
         # Достигнут лимит попыток - закрываем браузер
-        try:
-            logger.info("⚠️ Достигнут лимит попыток. Закрываем браузер...")
-            await browser_manager.close_browser(user_id)
-            logger.info("✅ Браузер успешно закрыт при достижении лимита")
-        except Exception as browser_error:
-            logger.warning(f"⚠️ Не удалось закрыть браузер при лимите: {browser_error}")
-        
-        await status_message.edit_text(
-            f"⚠️ <b>Достигнут лимит попыток</b>\n\n"
-            f"📦 Артикул: <code>{article}</code>\n"
-            f"📊 Сделано попыток: {attempts}\n\n"
-            f"Браузер закрыт.\n"
-            f"Попробуйте запустить процесс заново.",
-            parse_mode="HTML",
-            reply_markup=get_redistribution_menu()
+        logger.info("⚠️ Достигнут лимит попыток")
+        await _finish_hunt(
+            user_id, state, status_message.edit_text,
+            _STATUS_TMPL.format(
+                title="⚠️ <b>Достигнут лимит попыток</b>",
+                header=header,
+                tail=(
+                    f"📊 Сделано попыток: {attempts}\n\n"
+                    f"Браузер закрыт.\n"
+                    f"Попробуйте запустить процесс заново."
+                )
+            ),
+            get_redistribution_menu()
         )
-        await state.clear()
         
     except Exception as e:
         logger.error(f"❌ Ошибка в цикле распределения: {e}")
         
         # Закрываем браузер при критической ошибке
-        try:
-            logger.info("❌ Критическая ошибка. Закрываем браузер...")
-            await browser_manager.close_browser(user_id)
-            logger.info("✅ Браузер успешно закрыт при ошибке")
-        except Exception as browser_error:
-            logger.warning(f"⚠️ Не удалось закрыть браузер при ошибке: {browser_error}")
-        
-        await message.answer(
+        await _finish_hunt(
+            message.from_user.id, state, message.answer,
             "❌ <b>Ошибка</b>\n\n"
             "Произошла ошибка в процессе охоты за поставкой.\n"
             "Браузер закрыт.",
-            parse_mode="HTML",
-            reply_markup=get_redistribution_menu()
+            get_redistribution_menu()
         )
-        await state.clear()
 
 
 @router.message(RedistributionStates.waiting_for_quantity)
@@ -1246,18 +1278,8 @@ async def process_quantity_input(message: Message, state: FSMContext):
         
         logger.info(f"👤 Пользователь {user_id} ввел количество: {quantity_str}")
         
-        # Валидация количества
-        try:
-            quantity = int(quantity_str)
-            if quantity <= 0:
-                await message.answer(
-                    "❌ <b>Неверное количество</b>\n\n"
-                    "Количество должно быть положительным числом.\n"
-                    "Попробуйте еще раз:",
-                    parse_mode="HTML"
-                )
-                return
-        except ValueError:
+        # Валидация количества: только цифры, без знака, пробелов и "_" (int() их бы принял)
+        if not quantity_str.isdecimal():
             await message.answer(
                 "❌ <b>Неверный формат</b>\n\n"
                 "Введите число (например: <code>10</code>).\n"
@@ -1266,6 +1288,16 @@ async def process_quantity_input(message: Message, state: FSMContext):
             )
             return
         
+        quantity = int(quantity_str)
+        if quantity <= 0:
+            await message.answer(
+                "❌ <b>Неверное количество</b>\n\n"
+                "Количество должно быть положительным числом.\n"
+                "Попробуйте еще раз:",
+                parse_mode="HTML"
+            )
+            return
+        
         # Получаем данные из состояния
         state_data = await state.get_data()
         article = state_data.get('article')
@@ -1312,23 +1344,15 @@ async def process_quantity_input(message: Message, state: FSMContext):
 async def stop_redistribution_hunt(callback: CallbackQuery, state: FSMContext):
     """Остановить охоту за поставкой."""
     user_id = callback.from_user.id
+    logger.info(f"🛑 Пользователь {user_id} остановил охоту")
     
     # Закрываем браузер при остановке
-    try:
-        logger.info(f"🛑 Пользователь {user_id} остановил охоту. Закрываем браузер...")
-        browser_manager = BrowserManager()
-        await browser_manager.close_browser(user_id)
-        logger.info("✅ Браузер успешно закрыт при остановке охоты")
-    except Exception as browser_error:
-        logger.warning(f"⚠️ Не удалось закрыть браузер при остановке: {browser_error}")
-    
-    await state.clear()
-    await callback.message.edit_text(
+    await _finish_hunt(
+        user_id, state, callback.message.edit_text,
         "🛑 <b>Охота за поставкой остановлена</b>\n\n"
         "Браузер закрыт.\n"
         "Вы можете запустить новую охоту в любое время.",
-        parse_mode="HTML",
-        reply_markup=get_redistribution_menu()
+        get_redistribution_menu()
     )
     await callback.answer("Охота остановлена")
 
@@ -1374,24 +1398,9 @@ async def handle_source_warehouse_selection(callback: CallbackQuery, callback_da
         # Переходим к выбору склада назначения
         await state.set_state(RedistributionStates.waiting_for_destination_warehouse)
         
-        # Создаем список складов назначения (фиксированный)
+        # Создаем список складов назначения (фиксированный) без склада откуда
         destination_warehouses = [
-            {"id": "dest_1", "name": "Коледино"},
-            {"id": "dest_2", "name": "Казань"},
-            {"id": "dest_3", "name": "Электросталь"},
-            {"id": "dest_4", "name": "Санкт-Петербург Уткина Завод"},
-            {"id": "dest_5", "name": "Екатеринбург – Испытателей 14г"},
-            {"id": "dest_6", "name": "Тула"},
-            {"id": "dest_7", "name": "Невинномысск"},
-            {"id": "dest_8", "name": "Рязань (Тюшевское)"},
-            {"id": "dest_9", "name": "Котовск"},
-            {"id": "dest_10", "name": "Волгоград"},
-            {"id": "dest_11", "name": "Сарапул"}
-        ]
-        
-        # Убираем склад откуда из списка назначения
-        destination_warehouses = [
-            w for w in destination_warehouses 
+            w for w in DESTINATION_WAREHOUSES.values()
             if w["name"] != selected_warehouse["name"]
         ]
         
@@ -1428,25 +1437,7 @@ async def handle_destination_warehouse_selection(callback: CallbackQuery, callba
         source_warehouse = state_data.get('source_warehouse')
         
         # Находим выбранный склад назначения
-        destination_warehouses = [
-            {"id": "dest_1", "name": "Коледино"},
-            {"id": "dest_2", "name": "Казань"},
-            {"id": "dest_3", "name": "Электросталь"},
-            {"id": "dest_4", "name": "Санкт-Петербург Уткина Завод"},
-            {"id": "dest_5", "name": "Екатеринбург – Испытателей 14г"},
-            {"id": "dest_6", "name": "Тула"},
-            {"id": "dest_7", "name": "Невинномысск"},
-            {"id": "dest_8", "name": "Рязань (Тюшевское)"},
-            {"id": "dest_9", "name": "Котовск"},
-            {"id": "dest_10", "name": "Волгоград"},
-            {"id": "dest_11", "name": "Сарапул"}
-        ]
-        
-        selected_destination = None
-        for warehouse in destination_warehouses:
-            if warehouse.get('id') == warehouse_id:
-                selected_destination = warehouse
-                break
+        selected_destination = DESTINATION_WAREHOUSES.get(warehouse_id)
         
         if not selected_destination:
             await callback.answer("❌ Склад не найден", show_alert=True)
@@ -1458,16 +1449,6 @@ async def handle_destination_warehouse_selection(callback: CallbackQuery, callba
         # Переходим к вводу количества
         await state.set_state(RedistributionStates.waiting_for_quantity)
         
-        # Создаем клавиатуру отмены
-        cancel_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="❌ Отмена",
-                    callback_data="redistribution_menu"
-                )
-            ]
-        ])
-        
         available_quantity = source_warehouse.get('quantity', 0)
         
         await callback.message.edit_text(
@@ -1479,7 +1460,7 @@ async def handle_destination_warehouse_selection(callback: CallbackQuery, callba
             f"💡 Введите количество товара для перемещения:\n"
             f"(от 1 до {available_quantity} шт)",
             parse_mode="HTML",
-            reply_markup=cancel_keyboard
+            reply_markup=_CANCEL_TO_REDIST_KB
         )
         
         await callback.answer()
@@ -1487,69 +1468,3 @@ async def handle_destination_warehouse_selection(callback: CallbackQuery, callba
     except Exception as e:
         logger.error(f"❌ Ошибка при выборе склада назначения: {e}")
         await callback.answer("❌ Ошибка", show_alert=True)
-
-
-@router.message(RedistributionStates.waiting_for_quantity)
-async def handle_quantity_input(message: Message, state: FSMContext):
-    """Обработка ввода количества и запуск бесконечной охоты."""
-    try:
-        user_id = message.from_user.id
-        quantity_str = message.text.strip()
-        
-        # Валидация количества
-        if not quantity_str.isdigit():
-            await message.answer(
-                "❌ <b>Неверный формат</b>\n\n"
-                "💡 Введите количество числом (например: 5):",
-                parse_mode="HTML"
-            )
-            return
-        
-        quantity = int(quantity_str)
-        if quantity <= 0:
-            await message.answer(
-                "❌ <b>Неверное количество</b>\n\n"
-                "💡 Количество должно быть больше 0:",
-                parse_mode="HTML"
-            )
-            return
-        
-        # Получаем данные из состояния
-        state_data = await state.get_data()
-        article = state_data.get('article')
-        source_warehouse = state_data.get('source_warehouse')
-        destination_warehouse = state_data.get('destination_warehouse')
-        available_quantity = source_warehouse.get('quantity', 0)
-        
-        # Проверяем, не превышает ли количество доступное
-        if quantity > available_quantity:
-            await message.answer(
-                f"❌ <b>Превышено доступное количество</b>\n\n"
-                f"📊 Доступно: <b>{available_quantity}</b> шт\n"
-                f"📝 Вы ввели: <b>{quantity}</b> шт\n\n"
-                f"💡 Введите количество не больше {available_quantity}:",
-                parse_mode="HTML"
-            )
-            return
-        
-        # Сохраняем количество и запускаем бесконечную охоту
-        await state.update_data(quantity=quantity)
-        
-        # Запускаем бесконечную охоту за поставкой
-        await start_redistribution_cycle(message, state)
-        
-    except ValueError:
-        await message.answer(
-            "❌ <b>Неверный формат</b>\n\n"
-            "💡 Введите количество числом (например: 5):",
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        logger.error(f"❌ Ошибка обработки количества для пользователя {user_id}: {e}")
-        await message.answer(
-            "❌ <b>Ошибка</b>\n\n"
-            "Произошла ошибка при обработке количества.",
-            parse_mode="HTML",
-            reply_markup=get_redistribution_menu()
-        )
-        await state.clear()
@@ -1,20 +1,56 @@
 """
 Обработчики для управления поставками
 """
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
-from typing import List, Dict, Any
+from aiogram.fsm.state import StatesGroup
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Optional, Set, Tuple
 
+from ..states import State
 from ...utils.logger import get_logger
-from ...services.wb_supplies_api import WBSuppliesAPIClient
+from ...services.wb_supplies_api import WBSuppliesAPIClient, preload_user_data, supplies_api_pool
+from ...services.supplies_cache import supplies_cache
+from ..utils.session_cache import session_cache
 # Removed user_api_keys - using PostgreSQL database only
-from ..keyboards.inline import back_to_main_menu_keyboard
+from ..keyboards.inline import (
+    back_to_main_menu_keyboard, SupplySelectCallback, MultiToggleCallback,
+    encode_supply_id, decode_supply_id
+)
+from .callbacks import get_user_api_keys_list
 
 logger = get_logger(__name__)
 router = Router()
 
+# MultiBookingManager приложения (берется из main при первом обращении)
+_multi_booking_manager = None
+
+# Последнее отправленное содержимое сообщений: (chat_id, message_id) -> (хеш, edit_date)
+_LAST_RENDER_MAX = 4096
+_last_render: "OrderedDict[Tuple[int, int], Tuple[bytes, Any]]" = OrderedDict()
+
+# Отложенные редактирования сообщений по chat_id (схлопывание быстрых нажатий)
+_EDIT_DEBOUNCE_SECONDS = 0.25
+_pending_edits: Dict[int, asyncio.Task] = {}
+
+# Фоновые задачи обработчиков: цикл событий держит задачи только по слабой ссылке
+_background_tasks: Set[asyncio.Task] = set()
+
+# Фоновая загрузка складов, запущенная при загрузке списка поставок из API:
+# user_id -> (api_key, task, время запуска)
+_WAREHOUSES_PREFETCH_TTL = 300
+_WAREHOUSES_PREFETCH_MAX = 1024
+_WAREHOUSES_PREFETCH: "OrderedDict[int, Tuple[str, asyncio.Task[List[Dict[str, Any]]], float]]" = OrderedDict()
+
 
 class SuppliesStates(StatesGroup):
     """Состояния для работы с поставками."""
@@ -25,70 +61,361 @@ class SuppliesStates(StatesGroup):
     multi_booking_selection = State()  # Состояние мультибронирования
 
 
-def create_supplies_keyboard(supplies: List[Dict[str, Any]], multi_booking_mode: bool = False, selected_supplies: List[str] = None) -> InlineKeyboardMarkup:
+# Статические клавиатуры: собираются один раз при импорте и переиспользуются
+_BACK_TO_MAIN_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
+])
+_NO_SUPPLIES_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Обновить", callback_data="view_supplies")],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
+])
+_SUPPLIES_ERROR_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="view_supplies")],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
+])
+_NO_WAREHOUSES_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Обновить", callback_data="view_warehouses")],
+    [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
+])
+_WAREHOUSES_ERROR_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="view_warehouses")],
+    [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
+])
+_API_KEY_SAVED_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📦 Показать поставки", callback_data="view_supplies")],
+    [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="main_menu")]
+])
+_BACK_TO_SUPPLIES_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="view_supplies")]
+])
+_MULTI_BOOKING_OPTIONS_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📅 Выбрать дату", callback_data="multi_select_date")],
+    [InlineKeyboardButton(text="📊 Выбрать коэффициент", callback_data="multi_select_coefficient")],
+    [InlineKeyboardButton(text="🔥 Максимальный коэффициент", callback_data="multi_max_coefficient")],
+    [InlineKeyboardButton(text="⚡ Быстрое бронирование", callback_data="multi_quick_booking")],
+    [InlineKeyboardButton(text="⬅️ Назад к выбору", callback_data="multi_booking_mode")]
+])
+_MAIN_MENU_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
+])
+_MULTI_BOOKING_ERROR_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="start_multi_booking")],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="multi_booking_mode")]
+])
+
+
+# Кнопки управления под списками поставок и складов
+_MGMT_MULTI = (
+    [InlineKeyboardButton(text="🎯 Начать мультибронь", callback_data="start_multi_booking")],
+    [InlineKeyboardButton(text="🔄 Обновить список", callback_data="multi_supplies_refresh")],
+    [InlineKeyboardButton(text="⬅️ Обычный режим", callback_data="view_supplies")]
+)
+_MGMT_MULTI_WITH_CLEAR = (
+    [InlineKeyboardButton(text="🗑 Очистить выбор", callback_data="clear_multi_selection")],
+    *_MGMT_MULTI
+)
+_MGMT_NORMAL = (
+    [InlineKeyboardButton(text="🎯 Мультибронирование", callback_data="multi_booking_mode")],
+    [InlineKeyboardButton(text="🔄 Обновить список", callback_data="supplies_refresh")],
+    [InlineKeyboardButton(text="🏬 Склады", callback_data="view_warehouses")],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
+)
+_MGMT_WAREHOUSES = (
+    [InlineKeyboardButton(text="🔄 Обновить", callback_data="warehouses_refresh")],
+    [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
+)
+
+
+@lru_cache(maxsize=1024)
+def _supply_actions_kb(supply_id: str) -> InlineKeyboardMarkup:
+    """Клавиатура действий с поставкой (кешируется по ID поставки)."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🎯 Забронировать слот", callback_data=f"book_supply:{supply_id}")],
+        [InlineKeyboardButton(text="👁‍🗨 Мониторинг слотов", callback_data=f"monitor_supply:{supply_id}")],
+        [InlineKeyboardButton(text="📋 Детали поставки", callback_data=f"supply_details:{supply_id}")],
+        [InlineKeyboardButton(text="⬅️ К списку поставок", callback_data="view_supplies")]
+    ])
+
+
+# Правила подбора эмодзи по статусу (для поиска по подстроке)
+_STATUS_EMOJI_RULES = (
+    ("Принято", "✅"),
+    ("Не запланировано", "🔥"),
+    ("Запланировано", "📅"),
+    ("Отгрузка разрешена", "🚚"),
+    ("Идёт приёмка", "📦"),
+    ("Отгружено", "🏁"),
+)
+# Канонические названия статусов из WBSuppliesAPIClient._get_status_name
+_STATUS_EMOJI = {
+    **dict(_STATUS_EMOJI_RULES),
+    "Отгружено на воротах": "🏁",
+}
+# Поиск любого из статусов правил в строке одним проходом
+_STATUS_RE = re.compile("|".join(re.escape(key) for key, _ in _STATUS_EMOJI_RULES))
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Запускает задачу в фоне, сохраняя на нее ссылку до завершения."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _safe_delete(message: Message) -> None:
+    """Удаляет сообщение, игнорируя ошибки Telegram."""
+    try:
+        await message.delete()
+    except Exception:
+        pass
+
+
+def _drop_prefetch(user_id: int) -> None:
+    """Удаляет фоновую загрузку складов пользователя, отменяя ее, если она еще идет."""
+    prefetched = _WAREHOUSES_PREFETCH.pop(user_id, None)
+    if prefetched and not prefetched[1].done():
+        prefetched[1].cancel()
+
+
+def _prefetch_warehouses(user_id: int, api_key: str, api_client: WBSuppliesAPIClient) -> None:
+    """
+    Запускает фоновую загрузку складов, чтобы следующий экран открылся сразу.
+    
+    Не запускает повторно, если для того же ключа загрузка еще идет или
+    ее результат моложе _WAREHOUSES_PREFETCH_TTL.
+    """
+    now = time.monotonic()
+    previous = _WAREHOUSES_PREFETCH.get(user_id)
+    if previous and previous[0] == api_key:
+        if not previous[1].done() or now - previous[2] < _WAREHOUSES_PREFETCH_TTL:
+            return
+    _drop_prefetch(user_id)
+    
+    task = asyncio.create_task(api_client.get_warehouses())
+    # Забираем исключение, если результат так и не понадобится
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    _WAREHOUSES_PREFETCH[user_id] = (api_key, task, now)
+    
+    # Записи упорядочены по времени запуска: устаревшие и лишние удаляем с начала
+    while _WAREHOUSES_PREFETCH:
+        old_user_id, (_, old_task, started_at) = next(iter(_WAREHOUSES_PREFETCH.items()))
+        expired = old_task.done() and now - started_at >= _WAREHOUSES_PREFETCH_TTL
+        if not expired and len(_WAREHOUSES_PREFETCH) <= _WAREHOUSES_PREFETCH_MAX:
+            break
+        _drop_prefetch(old_user_id)
+
+
+async def _take_prefetched_warehouses(user_id: int, api_key: str) -> Optional[List[Dict[str, Any]]]:
+    """Возвращает склады из фоновой загрузки или None, если ее нет, она устарела или упала."""
+    prefetched = _WAREHOUSES_PREFETCH.pop(user_id, None)
+    if not prefetched or prefetched[0] != api_key:
+        return None
+    if time.monotonic() - prefetched[2] >= _WAREHOUSES_PREFETCH_TTL:
+        return None
+    
+    try:
+        return await prefetched[1]
+    except Exception as e:
+        logger.warning("⚠️ Фоновая загрузка складов не удалась: %s", e)
+        return None
+
+
+def _get_multi_booking_manager():
+    """Возвращает менеджер мультибронирования, импортируя main только один раз."""
+    global _multi_booking_manager
+    if _multi_booking_manager is None:
+        from ...main import get_multi_booking_manager
+        _multi_booking_manager = get_multi_booking_manager()
+    return _multi_booking_manager
+
+
+async def _safe_edit(
+    message: Message,
+    text: str,
+    parse_mode: Optional[str] = None,
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+) -> None:
+    """
+    Редактирует сообщение, пропуская вызов, если содержимое не изменилось.
+    
+    Пропуск возможен только когда сообщение с тех пор не редактировалось
+    другими обработчиками (совпадает edit_date), иначе редактируем как обычно.
+    """
+    key = (message.chat.id, message.message_id)
+    markup_json = reply_markup.model_dump_json() if reply_markup else ""
+    digest = hashlib.blake2b(f"{text}\x00{markup_json}".encode(), digest_size=16).digest()
+    
+    last = _last_render.get(key)
+    if last and last[0] == digest and last[1] == message.edit_date:
+        return
+    
+    result = await message.edit_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+    if isinstance(result, Message):
+        _last_render[key] = (digest, result.edit_date)
+        _last_render.move_to_end(key)
+        if len(_last_render) > _LAST_RENDER_MAX:
+            _last_render.popitem(last=False)
+
+
+async def _delayed_edit(message: Message, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """Редактирует сообщение после паузы, если за это время не пришло новое нажатие."""
+    await asyncio.sleep(_EDIT_DEBOUNCE_SECONDS)
+    try:
+        await _safe_edit(message, text, parse_mode="HTML", reply_markup=reply_markup)
+    except Exception as e:
+        logger.warning("⚠️ Ошибка обновления клавиатуры: %s", e)
+    finally:
+        if _pending_edits.get(message.chat.id) is asyncio.current_task():
+            del _pending_edits[message.chat.id]
+
+
+def _cancel_scheduled_edit(message: Message) -> None:
+    """Отменяет еще не отправленное редактирование для чата."""
+    pending = _pending_edits.pop(message.chat.id, None)
+    if pending and not pending.done():
+        pending.cancel()
+
+
+def _schedule_edit(message: Message, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """Планирует редактирование сообщения, отменяя еще не отправленное для этого чата."""
+    _cancel_scheduled_edit(message)
+    _pending_edits[message.chat.id] = asyncio.create_task(_delayed_edit(message, text, reply_markup))
+
+
+class LatestOnlyEdit:
+    """
+    Фоновое редактирование сообщения, при котором отправляется только последний текст.
+
+    push не ждет Telegram: пока идет одно редактирование, новые тексты заменяют
+    друг друга, и после его завершения отправляется только самый свежий.
+    """
+
+    def __init__(self, message: Message, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        self.message = message
+        self.reply_markup = reply_markup
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def push(self, text: str) -> None:
+        """Ставит текст на отправку, вытесняя еще не отправленный."""
+        self._pending = text
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        try:
+            while self._pending is not None:
+                text, self._pending = self._pending, None
+                try:
+                    await _safe_edit(self.message, text, parse_mode="HTML", reply_markup=self.reply_markup)
+                except Exception as e:
+                    logger.warning("⚠️ Ошибка обновления прогресса: %s", e)
+        finally:
+            self._task = None
+
+
+def _api_key_hash(api_key: str) -> str:
+    """Хеш API ключа для состояния FSM (сам ключ в хранилище состояний не кладем)."""
+    return hashlib.sha1(api_key.encode()).hexdigest()[:16]
+
+
+def _supply_id_from_callback(data: str) -> str:
+    """ID поставки из callback_data (компактный формат или старый supply_select:/multi_toggle:)."""
+    prefix, _, token = data.partition(":")
+    if prefix in (SupplySelectCallback.__prefix__, MultiToggleCallback.__prefix__):
+        return decode_supply_id(token)
+    return token
+
+
+def _trunc(text: str, limit: int = 25) -> str:
+    """Обрезает текст кнопки до limit символов с многоточием."""
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _format_supply_date(created_at: str) -> str:
+    """Форматирует дату создания поставки для карточки."""
+    if not created_at:
+        return "Неизвестно"
+    try:
+        dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        return dt.strftime("%d.%m.%Y %H:%M")
+    except (ValueError, TypeError, AttributeError):
+        return created_at
+
+
+def _slim_supplies(supplies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Оставляет только поля поставки, нужные обработчикам, для хранения в FSM.
+    
+    Дату создания форматируем здесь же, один раз при загрузке.
+    """
+    return [
+        {
+            "id": supply.get("id"),
+            "name": supply.get("name", f"Поставка #{supply.get('id', '')}"),
+            "status": supply.get("status", "unknown"),
+            "createDate": supply.get("createDate", ""),
+            "_formatted_date": _format_supply_date(supply.get("createDate", "")),
+        }
+        for supply in supplies
+    ]
+
+
+# Шаблоны текста кнопки поставки
+_ROW_TEXT = "{emoji} {name} ({status})".format
+_MULTI_ROW_TEXT = "{checkbox} {emoji} {name}".format
+
+
+@lru_cache(maxsize=4096)
+def _supply_row(supply_id: Any, supply_name: str, status: str, multi_booking_mode: bool, checked: bool) -> List[InlineKeyboardButton]:
+    """
+    Строка клавиатуры для одной поставки.
+    
+    Кешируется: при переключении чекбокса заново собирается только
+    изменившаяся строка, остальные берутся из кеша.
+    """
+    # Эмодзи для статуса: точное совпадение, иначе поиск по подстроке
+    status_emoji = _STATUS_EMOJI.get(status)
+    if status_emoji is None:
+        match = _STATUS_RE.search(status)
+        status_emoji = _STATUS_EMOJI[match.group(0)] if match else "📦"
+    
+    # Обрезаем название и добавляем статус
+    display_name = _trunc(supply_name)
+    
+    # В режиме мультибронирования добавляем чекбоксы
+    if multi_booking_mode:
+        button_text = _MULTI_ROW_TEXT(checkbox="☑️" if checked else "☐", emoji=status_emoji, name=display_name)
+        callback_data = MultiToggleCallback(sid=encode_supply_id(supply_id)).pack()
+    else:
+        button_text = _ROW_TEXT(emoji=status_emoji, name=display_name, status=status)
+        callback_data = SupplySelectCallback(sid=encode_supply_id(supply_id)).pack()
+    
+    return [InlineKeyboardButton(text=button_text, callback_data=callback_data)]
+
+
+def create_supplies_keyboard(supplies: List[Dict[str, Any]], multi_booking_mode: bool = False, selected_supplies: Optional[Set[str]] = None) -> InlineKeyboardMarkup:
     """Создает клавиатуру со списком ВСЕХ поставок."""
-    keyboard = []
-    selected_supplies = selected_supplies or []
+    # Показываем максимум 20 поставок; список строк выделяем сразу нужного размера
+    keyboard = [None] * min(20, len(supplies))
+    selected_supplies = selected_supplies or set()
     
-    for supply in supplies[:20]:  # Показываем максимум 20 поставок
+    for index, supply in enumerate(islice(supplies, 20)):
         supply_id = supply.get("id", "")
-        supply_name = supply.get("name", f"Поставка #{supply_id}")
-        status = supply.get("status", "unknown")
-        
-        # Эмодзи для статуса по названию
-        status_emoji = "📦"
-        if "Принято" in status:
-            status_emoji = "✅"
-        elif "Не запланировано" in status:
-            status_emoji = "🔥"
-        elif "Запланировано" in status:
-            status_emoji = "📅"
-        elif "Отгрузка разрешена" in status:
-            status_emoji = "🚚"
-        elif "Идёт приёмка" in status:
-            status_emoji = "📦"
-        elif "Отгружено" in status:
-            status_emoji = "🏁"
-        
-        # Обрезаем название и добавляем статус
-        display_name = supply_name[:25]
-        if len(supply_name) > 25:
-            display_name += "..."
-        
-        # В режиме мультибронирования добавляем чекбоксы
-        if multi_booking_mode:
-            checkbox = "☑️" if str(supply_id) in selected_supplies else "☐"
-            button_text = f"{checkbox} {status_emoji} {display_name}"
-            callback_data = f"multi_toggle:{supply_id}"
-        else:
-            button_text = f"{status_emoji} {display_name} ({status})"
-            callback_data = f"supply_select:{supply_id}"
-        
-        keyboard.append([
-            InlineKeyboardButton(
-                text=button_text,
-                callback_data=callback_data
-            )
-        ])
+        keyboard[index] = _supply_row(
+            supply_id,
+            supply.get("name", f"Поставка #{supply_id}"),
+            supply.get("status", "unknown"),
+            multi_booking_mode,
+            multi_booking_mode and str(supply_id) in selected_supplies
+        )
     
     # Кнопки управления
     if multi_booking_mode:
-        management_buttons = [
-            [InlineKeyboardButton(text="🎯 Начать мультибронь", callback_data="start_multi_booking")],
-            [InlineKeyboardButton(text="🔄 Обновить список", callback_data="multi_supplies_refresh")],
-            [InlineKeyboardButton(text="⬅️ Обычный режим", callback_data="view_supplies")]
-        ]
-        if selected_supplies:
-            management_buttons.insert(0, [InlineKeyboardButton(text="🗑 Очистить выбор", callback_data="clear_multi_selection")])
+        keyboard.extend(_MGMT_MULTI_WITH_CLEAR if selected_supplies else _MGMT_MULTI)
     else:
-        management_buttons = [
-            [InlineKeyboardButton(text="🎯 Мультибронирование", callback_data="multi_booking_mode")],
-            [InlineKeyboardButton(text="🔄 Обновить список", callback_data="supplies_refresh")],
-            [InlineKeyboardButton(text="🏬 Склады", callback_data="view_warehouses")],
-            [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
-        ]
-    
-    keyboard.extend(management_buttons)
+        keyboard.extend(_MGMT_NORMAL)
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
@@ -97,14 +424,12 @@ def create_warehouses_keyboard(warehouses: List[Dict[str, Any]]) -> InlineKeyboa
     """Создает клавиатуру со списком складов."""
     keyboard = []
     
-    for warehouse in warehouses[:15]:  # Показываем максимум 15 складов
+    for warehouse in islice(warehouses, 15):  # Показываем максимум 15 складов
         warehouse_id = warehouse.get("id", "")
         warehouse_name = warehouse.get("name", f"Склад #{warehouse_id}")
         
         # Обрезаем длинные названия
-        display_name = warehouse_name[:35]
-        if len(warehouse_name) > 35:
-            display_name += "..."
+        display_name = _trunc(warehouse_name, 35)
             
         keyboard.append([
             InlineKeyboardButton(
@@ -113,10 +438,7 @@ def create_warehouses_keyboard(warehouses: List[Dict[str, Any]]) -> InlineKeyboa
             )
         ])
     
-    keyboard.extend([
-        [InlineKeyboardButton(text="🔄 Обновить", callback_data="warehouses_refresh")],
-        [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
-    ])
+    keyboard.extend(_MGMT_WAREHOUSES)
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
@@ -127,70 +449,125 @@ async def show_supplies_menu(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
     
     # Проверяем есть ли API ключ у пользователя
-    from .callbacks import get_user_api_keys_list
     api_keys = await get_user_api_keys_list(user_id)
     if not api_keys:
-        await callback.message.edit_text(
+        await _safe_edit(
+            callback.message,
             "❌ <b>API ключ не найден</b>\n\n"
             "Для работы с поставками необходим API ключ Wildberries.\n"
             "Отправьте ваш API ключ:",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
-            ])
+            reply_markup=_BACK_TO_MAIN_KB
         )
         await state.set_state(SuppliesStates.waiting_for_api_key)
         return
     
-    await callback.message.edit_text(
+    await _load_supplies(callback, state, api_keys[0])
+
+
+async def _render_supplies_list(
+    message: Message,
+    state: FSMContext,
+    user_id: int,
+    api_key: str,
+    supplies: List[Dict[str, Any]]
+) -> None:
+    """Показывает список поставок и сохраняет его в состоянии."""
+    if not supplies:
+        await _safe_edit(
+            message,
+            "📭 <b>Поставки не найдены</b>\n\n"
+            "У вас пока нет неплановых поставок для бронирования.\n"
+            "Создайте поставку в личном кабинете WB.",
+            parse_mode="HTML",
+            reply_markup=_NO_SUPPLIES_KB
+        )
+        return
+    
+    # Показываем поставки со статусами 1 и 2
+    await _safe_edit(
+        message,
+        f"📦 <b>Поставки для бронирования ({len(supplies)})</b>\n\n"
+        "🔥 Не запланировано, 📅 Запланировано\n"
+        "Выберите поставку для бронирования слота:",
+        parse_mode="HTML",
+        reply_markup=create_supplies_keyboard(supplies)
+    )
+    
+    # Сам список держим в кеше, в состоянии - только ключ к нему
+    supplies_key = await supplies_cache.put(user_id, supplies)
+    await state.update_data(supplies_api_key_hash=_api_key_hash(api_key), supplies_key=supplies_key)
+    await state.set_state(SuppliesStates.viewing_supplies)
+
+
+async def _refresh_supplies_list(
+    message: Message,
+    state: FSMContext,
+    user_id: int,
+    api_key: str,
+    shown_supplies: List[Dict[str, Any]]
+) -> None:
+    """Загружает свежий список из API и обновляет сообщение, если список изменился."""
+    try:
+        supplies = _slim_supplies(
+            await supplies_cache.get_supplies_cached(user_id, api_key, limit=50, force=True)
+        )
+        if supplies == shown_supplies:
+            return
+        
+        # Не трогаем сообщение, если пользователь уже ушел с экрана списка
+        if await state.get_state() != SuppliesStates.viewing_supplies.state:
+            return
+        supplies_key = (await state.get_data()).get("supplies_key")
+        if await supplies_cache.get(supplies_key) != shown_supplies:
+            return
+        
+        await _render_supplies_list(message, state, user_id, api_key, supplies)
+    except Exception as e:
+        logger.warning("⚠️ Не удалось обновить список поставок в фоне: %s", e)
+
+
+async def _load_supplies(callback: CallbackQuery, state: FSMContext, api_key: str, force: bool = False) -> None:
+    """Загружает поставки по API ключу (из кеша, если не force) и показывает их список."""
+    user_id = callback.from_user.id
+    
+    await _safe_edit(
+        callback.message,
         "⏳ <b>Загружаю список поставок...</b>\n\n"
         "Подключаюсь к API Wildberries...",
         parse_mode="HTML"
     )
     
     try:
-        # Получаем список поставок через API
-        async with WBSuppliesAPIClient(api_keys[0]) as api_client:
-            supplies = await api_client.get_supplies(limit=50)
-            
-        if not supplies:
-            await callback.message.edit_text(
-                "📭 <b>Поставки не найдены</b>\n\n"
-                "У вас пока нет неплановых поставок для бронирования.\n"
-                "Создайте поставку в личном кабинете WB.",
-                parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔄 Обновить", callback_data="view_supplies")],
-                    [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
-                ])
-            )
-            return
+        # Получаем список поставок: кеш, затем свежий снимок из БД, затем API
+        raw_supplies = None if force else await supplies_cache.peek(user_id, api_key)
+        from_snapshot = False
+        if raw_supplies is None and not force:
+            raw_supplies = await supplies_cache.get_snapshot(user_id, api_key)
+            from_snapshot = raw_supplies is not None
+        if raw_supplies is None:
+            # Идем в API - заодно и за складами (если их не загружали недавно)
+            api_client = await supplies_api_pool.get(api_key)
+            _prefetch_warehouses(user_id, api_key, api_client)
+            raw_supplies = await supplies_cache.get_supplies_cached(user_id, api_key, limit=50, force=True)
         
-        # Показываем поставки со статусами 1 и 2
-        await callback.message.edit_text(
-            f"📦 <b>Поставки для бронирования ({len(supplies)})</b>\n\n"
-            "🔥 Не запланировано, 📅 Запланировано\n"
-            "Выберите поставку для бронирования слота:",
-            parse_mode="HTML",
-            reply_markup=create_supplies_keyboard(supplies)
-        )
+        supplies = _slim_supplies(raw_supplies)
+        await _render_supplies_list(callback.message, state, user_id, api_key, supplies)
         
-        # Сохраняем список поставок в состоянии
-        await state.update_data(supplies=supplies)
-        await state.set_state(SuppliesStates.viewing_supplies)
+        # Список из снимка показан сразу; свежие данные подтягиваем в фоне
+        if from_snapshot:
+            _spawn(_refresh_supplies_list(callback.message, state, user_id, api_key, supplies))
         
     except Exception as e:
-        logger.error(f"❌ Ошибка получения поставок для пользователя {user_id}: {e}")
-        await callback.message.edit_text(
+        logger.error("❌ Ошибка получения поставок для пользователя %s: %s", user_id, e)
+        await _safe_edit(
+            callback.message,
             f"❌ <b>Ошибка получения поставок</b>\n\n"
             f"Не удалось загрузить список поставок:\n"
             f"<code>{str(e)}</code>\n\n"
             f"Проверьте правильность API ключа.",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="view_supplies")],
-                [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
-            ])
+            reply_markup=_SUPPLIES_ERROR_KB
         )
 
 
@@ -199,37 +576,44 @@ async def show_warehouses_menu(callback: CallbackQuery, state: FSMContext):
     """Показывает список складов."""
     user_id = callback.from_user.id
     
-    from .callbacks import get_user_api_keys_list
     api_keys = await get_user_api_keys_list(user_id)
     if not api_keys:
         await callback.answer("❌ API ключ не найден", show_alert=True)
         return
     
-    await callback.message.edit_text(
+    await _safe_edit(
+        callback.message,
         "⏳ <b>Загружаю список складов...</b>\n\n"
         "Получаю данные о доступных складах WB...",
         parse_mode="HTML"
     )
     
     try:
-        # Получаем список складов через API
-        async with WBSuppliesAPIClient(api_keys[0]) as api_client:
-            warehouses = await api_client.get_warehouses()
+        # Берем склады из фоновой загрузки, если она есть, иначе запрашиваем API
+        warehouses = await _take_prefetched_warehouses(user_id, api_keys[0])
+        if warehouses is None:
+            api_client = await supplies_api_pool.get(api_keys[0])
+            if await supplies_cache.peek(user_id, api_keys[0]) is None:
+                # Заодно загружаем поставки, чтобы переход к ним был мгновенным
+                supplies, warehouses = await preload_user_data(api_client)
+                if supplies is not None:
+                    await supplies_cache.store(user_id, api_keys[0], supplies)
+            if warehouses is None:
+                warehouses = await api_client.get_warehouses()
             
         if not warehouses:
-            await callback.message.edit_text(
+            await _safe_edit(
+                callback.message,
                 "🏬 <b>Склады не найдены</b>\n\n"
                 "Не удалось получить список доступных складов.",
                 parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔄 Обновить", callback_data="view_warehouses")],
-                    [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
-                ])
+                reply_markup=_NO_WAREHOUSES_KB
             )
             return
         
         # Показываем список складов
-        await callback.message.edit_text(
+        await _safe_edit(
+            callback.message,
             f"🏬 <b>Доступные склады ({len(warehouses)})</b>\n\n"
             "Выберите склад для просмотра информации:",
             parse_mode="HTML",
@@ -240,69 +624,54 @@ async def show_warehouses_menu(callback: CallbackQuery, state: FSMContext):
         await state.update_data(warehouses=warehouses)
         
     except Exception as e:
-        logger.error(f"❌ Ошибка получения складов для пользователя {user_id}: {e}")
-        await callback.message.edit_text(
+        logger.error("❌ Ошибка получения складов для пользователя %s: %s", user_id, e)
+        await _safe_edit(
+            callback.message,
             f"❌ <b>Ошибка получения складов</b>\n\n"
             f"Не удалось загрузить список складов:\n"
             f"<code>{str(e)}</code>",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="view_warehouses")],
-                [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
-            ])
+            reply_markup=_WAREHOUSES_ERROR_KB
         )
 
 
+async def _render_supply_card(message: Message, supply: Dict[str, Any]) -> None:
+    """Показывает карточку поставки с кнопками действий."""
+    supply_id = supply.get("id")
+    supply_name = supply.get("name", f"Поставка #{supply_id}")
+    supply_status = supply.get("status", "unknown")
+    formatted_date = supply.get("_formatted_date") or _format_supply_date(
+        supply.get("createDate", "")
+    )
+    
+    await _safe_edit(
+        message,
+        f"📦 <b>{supply_name}</b>\n\n"
+        f"🆔 ID: <code>{supply_id}</code>\n"
+        f"📊 Статус: {supply_status}\n"
+        f"📅 Создана: {formatted_date}\n\n"
+        f"Выберите действие:",
+        parse_mode="HTML",
+        reply_markup=_supply_actions_kb(str(supply_id))
+    )
+
+
+@router.callback_query(SupplySelectCallback.filter())
 @router.callback_query(F.data.startswith("supply_select:"))
 async def select_supply(callback: CallbackQuery, state: FSMContext):
     """Обработка выбора поставки."""
-    supply_id = callback.data.split(":")[1]
+    supply_id = _supply_id_from_callback(callback.data)
     user_id = callback.from_user.id
     
-    # Получаем данные поставок из состояния
+    # Находим выбранную поставку в показанном списке (ключи - строки, как и supply_id)
     data = await state.get_data()
-    supplies = data.get("supplies", [])
-    
-    # Находим выбранную поставку
-    selected_supply = None
-    for supply in supplies:
-        # Сравниваем как строки, так как supply_id приходит как строка
-        if str(supply.get("id")) == str(supply_id):
-            selected_supply = supply
-            break
+    selected_supply = await supplies_cache.get_one(data.get("supplies_key"), supply_id)
     
     if not selected_supply:
         await callback.answer("❌ Поставка не найдена", show_alert=True)
         return
     
-    supply_name = selected_supply.get("name", f"Поставка #{supply_id}")
-    supply_status = selected_supply.get("status", "unknown")
-    created_at = selected_supply.get("createDate", "")
-    
-    # Форматируем дату создания
-    formatted_date = "Неизвестно"
-    if created_at:
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-        except:
-            formatted_date = created_at
-    
-    await callback.message.edit_text(
-        f"📦 <b>{supply_name}</b>\n\n"
-        f"🆔 ID: <code>{supply_id}</code>\n"
-        f"📊 Статус: {supply_status}\n"
-        f"📅 Создана: {formatted_date}\n\n"
-        f"Выберите действие:",
-        parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🎯 Забронировать слот", callback_data=f"book_supply:{supply_id}")],
-            [InlineKeyboardButton(text="👁‍🗨 Мониторинг слотов", callback_data=f"monitor_supply:{supply_id}")],
-            [InlineKeyboardButton(text="📋 Детали поставки", callback_data=f"supply_details:{supply_id}")],
-            [InlineKeyboardButton(text="⬅️ К списку поставок", callback_data="view_supplies")]
-        ])
-    )
+    await _render_supply_card(callback.message, selected_supply)
     
     # Сохраняем выбранную поставку
     await state.update_data(selected_supply=selected_supply)
@@ -315,10 +684,8 @@ async def process_api_key(message: Message, state: FSMContext):
     user_id = message.from_user.id
     
     # Удаляем сообщение с API ключом для безопасности
-    try:
-        await message.delete()
-    except:
-        pass
+    # (в фоне, чтобы не ждать ответа Telegram перед проверкой ключа)
+    _spawn(_safe_delete(message))
     
     if not api_key or len(api_key) < 10:
         await message.answer(
@@ -337,8 +704,8 @@ async def process_api_key(message: Message, state: FSMContext):
     
     try:
         # Проверяем API ключ
-        async with WBSuppliesAPIClient(api_key) as api_client:
-            warehouses = await api_client.get_warehouses()
+        api_client = await supplies_api_pool.get(api_key)
+        warehouses = await api_client.get_warehouses()
             
         # Сохраняем API ключ в базе данных
         user = await get_user_by_telegram_id(user_id)
@@ -348,21 +715,20 @@ async def process_api_key(message: Message, state: FSMContext):
             # await user.save()
             pass
         
-        await loading_msg.edit_text(
+        await _safe_edit(
+            loading_msg,
             "✅ <b>API ключ сохранен!</b>\n\n"
             "Теперь вы можете работать с поставками.",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="📦 Показать поставки", callback_data="view_supplies")],
-                [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="main_menu")]
-            ])
+            reply_markup=_API_KEY_SAVED_KB
         )
         
         await state.clear()
         
     except Exception as e:
-        logger.error(f"❌ Ошибка проверки API ключа: {e}")
-        await loading_msg.edit_text(
+        logger.error("❌ Ошибка проверки API ключа: %s", e)
+        await _safe_edit(
+            loading_msg,
             f"❌ <b>Ошибка API ключа</b>\n\n"
             f"Не удалось подключиться к API WB:\n"
             f"<code>{str(e)}</code>\n\n"
@@ -374,7 +740,17 @@ async def process_api_key(message: Message, state: FSMContext):
 @router.callback_query(F.data == "supplies_refresh")
 async def refresh_supplies(callback: CallbackQuery, state: FSMContext):
     """Обновляет список поставок."""
-    await show_supplies_menu(callback, state)
+    key_hash = (await state.get_data()).get("supplies_api_key_hash")
+    api_key = None
+    if key_hash:
+        # Ключ берем из БД: если пользователь его удалил, обновлять по нему нельзя
+        api_keys = await get_user_api_keys_list(callback.from_user.id)
+        api_key = next((key for key in api_keys if _api_key_hash(key) == key_hash), None)
+    if not api_key:
+        await show_supplies_menu(callback, state)
+        return
+    
+    await _load_supplies(callback, state, api_key, force=True)
 
 
 @router.callback_query(F.data == "back_to_supply")
@@ -388,35 +764,7 @@ async def back_to_supply(callback: CallbackQuery, state: FSMContext):
         await show_supplies_menu(callback, state)
         return
     
-    supply_id = selected_supply.get("id")
-    supply_name = selected_supply.get("name", f"Поставка #{supply_id}")
-    supply_status = selected_supply.get("status", "unknown")
-    created_at = selected_supply.get("createDate", "")
-    
-    # Форматируем дату создания
-    formatted_date = "Неизвестно"
-    if created_at:
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            formatted_date = dt.strftime("%d.%m.%Y %H:%M")
-        except:
-            formatted_date = created_at
-    
-    await callback.message.edit_text(
-        f"📦 <b>{supply_name}</b>\n\n"
-        f"🆔 ID: <code>{supply_id}</code>\n"
-        f"📊 Статус: {supply_status}\n"
-        f"📅 Создана: {formatted_date}\n\n"
-        f"Выберите действие:",
-        parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🎯 Забронировать слот", callback_data=f"book_supply:{supply_id}")],
-            [InlineKeyboardButton(text="👁‍🗨 Мониторинг слотов", callback_data=f"monitor_supply:{supply_id}")],
-            [InlineKeyboardButton(text="📋 Детали поставки", callback_data=f"supply_details:{supply_id}")],
-            [InlineKeyboardButton(text="⬅️ К списку поставок", callback_data="view_supplies")]
-        ])
-    )
+    await _render_supply_card(callback.message, selected_supply)
 
 
 # =============================================================================
@@ -424,49 +772,49 @@ async def back_to_supply(callback: CallbackQuery, state: FSMContext):
 # =============================================================================
 
 @router.callback_query(F.data == "multi_booking_mode")
-async def enter_multi_booking_mode(callback: CallbackQuery, state: FSMContext):
+async def enter_multi_booking_mode(callback: CallbackQuery, state: FSMContext, force: bool = False):
     """Переключает в режим мультибронирования."""
-    await callback.message.edit_text(
+    await _safe_edit(
+        callback.message,
         "⏳ <b>Переключаюсь в режим мультибронирования...</b>\n\n"
         "Загружаю список поставок для выбора...",
         parse_mode="HTML"
     )
     
-    # Получаем существующие поставки из состояния или загружаем заново
+    # Получаем показанный ранее список из кеша или загружаем заново
+    user_id = callback.from_user.id
     data = await state.get_data()
-    supplies = data.get("supplies", [])
+    supplies = None if force else await supplies_cache.get(data.get("supplies_key"))
     
     if not supplies:
-        user_id = callback.from_user.id
-        from .callbacks import get_user_api_keys_list
         api_keys = await get_user_api_keys_list(user_id)
         if not api_keys:
-            await callback.message.edit_text(
+            await _safe_edit(
+                callback.message,
                 "❌ <b>API ключ не найден</b>\n\n"
                 "Для мультибронирования необходим API ключ.",
                 parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="⬅️ Назад", callback_data="view_supplies")]
-                ])
+                reply_markup=_BACK_TO_SUPPLIES_KB
             )
             return
             
         try:
-            async with WBSuppliesAPIClient(api_keys[0]) as api_client:
-                supplies = await api_client.get_supplies(limit=50)
+            supplies = _slim_supplies(
+                await supplies_cache.get_supplies_cached(user_id, api_keys[0], limit=50, force=force)
+            )
         except Exception as e:
-            logger.error(f"❌ Ошибка загрузки поставок для мультибронирования: {e}")
-            await callback.message.edit_text(
+            logger.error("❌ Ошибка загрузки поставок для мультибронирования: %s", e)
+            await _safe_edit(
+                callback.message,
                 f"❌ <b>Ошибка загрузки поставок</b>\n\n"
                 f"<code>{str(e)}</code>",
                 parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="⬅️ Назад", callback_data="view_supplies")]
-                ])
+                reply_markup=_BACK_TO_SUPPLIES_KB
             )
             return
     
-    await callback.message.edit_text(
+    await _safe_edit(
+        callback.message,
         f"🎯 <b>Мультибронирование (до 3 поставок)</b>\n\n"
         f"📦 Доступно поставок: {len(supplies)}\n"
         f"☑️ Выбрано: 0 / 3\n\n"
@@ -475,53 +823,69 @@ async def enter_multi_booking_mode(callback: CallbackQuery, state: FSMContext):
         reply_markup=create_supplies_keyboard(supplies, multi_booking_mode=True)
     )
     
-    # Сохраняем состояние
+    # Сохраняем состояние; выбор дальше ведется в кеше сессии
     await state.update_data(
-        supplies=supplies,
+        supplies_key=await supplies_cache.put(user_id, supplies),
         selected_supplies_multi=[],
         multi_booking_mode=True
     )
+    session_cache.update(callback.message.chat.id, supplies=supplies, selected_supplies_multi=set())
     await state.set_state(SuppliesStates.multi_booking_selection)
 
 
+async def _get_multi_session(chat_id: int, state: FSMContext) -> Dict[str, Any]:
+    """Данные выбора мультибронирования из кеша сессии (при промахе - из FSM)."""
+    session = session_cache.get(chat_id)
+    if session is None:
+        data = await state.get_data()
+        session = session_cache.update(
+            chat_id,
+            supplies=await supplies_cache.get(data.get("supplies_key")) or [],
+            selected_supplies_multi=set(data.get("selected_supplies_multi", []))
+        )
+    return session
+
+
+@router.callback_query(MultiToggleCallback.filter())
 @router.callback_query(F.data.startswith("multi_toggle:"))
 async def toggle_supply_selection(callback: CallbackQuery, state: FSMContext):
     """Переключает выбор поставки в режиме мультибронирования."""
-    supply_id = callback.data.split(":")[1]
+    supply_id = _supply_id_from_callback(callback.data)
     
-    data = await state.get_data()
-    selected_supplies = data.get("selected_supplies_multi", [])
-    supplies = data.get("supplies", [])
+    session = await _get_multi_session(callback.message.chat.id, state)
+    selected_supplies = session["selected_supplies_multi"]
+    supplies = session["supplies"]
     
     # Переключаем выбор
     if supply_id in selected_supplies:
-        selected_supplies.remove(supply_id)
+        selected_supplies.discard(supply_id)
     else:
         if len(selected_supplies) >= 3:
             await callback.answer("❌ Максимум 3 поставки одновременно!", show_alert=True)
             return
-        selected_supplies.append(supply_id)
+        selected_supplies.add(supply_id)
     
-    # Обновляем клавиатуру
-    await callback.message.edit_text(
+    # Обновляем клавиатуру (серия быстрых нажатий схлопывается в одно редактирование)
+    _schedule_edit(
+        callback.message,
         f"🎯 <b>Мультибронирование (до 3 поставок)</b>\n\n"
         f"📦 Доступно поставок: {len(supplies)}\n"
         f"☑️ Выбрано: {len(selected_supplies)} / 3\n\n"
         f"Нажмите на поставки для выбора:",
-        parse_mode="HTML",
-        reply_markup=create_supplies_keyboard(supplies, multi_booking_mode=True, selected_supplies=selected_supplies)
+        create_supplies_keyboard(supplies, multi_booking_mode=True, selected_supplies=selected_supplies)
     )
-    
-    await state.update_data(selected_supplies_multi=selected_supplies)
 
 
 @router.callback_query(F.data == "clear_multi_selection")
 async def clear_multi_selection(callback: CallbackQuery, state: FSMContext):
     """Очищает выбор в режиме мультибронирования."""
-    data = await state.get_data()
-    supplies = data.get("supplies", [])
+    _cancel_scheduled_edit(callback.message)
+    session = await _get_multi_session(callback.message.chat.id, state)
+    session["selected_supplies_multi"] = set()
+    supplies = session["supplies"]
     
-    await callback.message.edit_text(
+    await _safe_edit(
+        callback.message,
         f"🎯 <b>Мультибронирование (до 3 поставок)</b>\n\n"
         f"📦 Доступно поставок: {len(supplies)}\n"
         f"☑️ Выбрано: 0 / 3\n\n"
@@ -529,32 +893,28 @@ async def clear_multi_selection(callback: CallbackQuery, state: FSMContext):
         parse_mode="HTML",
         reply_markup=create_supplies_keyboard(supplies, multi_booking_mode=True)
     )
-    
-    await state.update_data(selected_supplies_multi=[])
 
 
 @router.callback_query(F.data == "multi_supplies_refresh")
 async def refresh_multi_supplies(callback: CallbackQuery, state: FSMContext):
     """Обновляет список поставок в режиме мультибронирования."""
-    await enter_multi_booking_mode(callback, state)
+    await enter_multi_booking_mode(callback, state, force=True)
 
 
 @router.callback_query(F.data == "start_multi_booking")
 async def start_multi_booking(callback: CallbackQuery, state: FSMContext):
     """Запускает мультибронирование выбранных поставок."""
-    data = await state.get_data()
-    selected_supplies_ids = data.get("selected_supplies_multi", [])
-    supplies = data.get("supplies", [])
+    _cancel_scheduled_edit(callback.message)
+    session = await _get_multi_session(callback.message.chat.id, state)
+    selected_supplies_ids = session["selected_supplies_multi"]
+    supplies = session["supplies"]
     
     if not selected_supplies_ids:
         await callback.answer("❌ Не выбрано ни одной поставки!", show_alert=True)
         return
     
     # Получаем информацию о выбранных поставках
-    selected_supplies = []
-    for supply in supplies:
-        if str(supply.get("id")) in selected_supplies_ids:
-            selected_supplies.append(supply)
+    selected_supplies = [supply for supply in supplies if str(supply.get("id")) in selected_supplies_ids]
     
     # Показываем подтверждение
     supplies_text = ""
@@ -563,7 +923,8 @@ async def start_multi_booking(callback: CallbackQuery, state: FSMContext):
         status = supply.get("status", "unknown")
         supplies_text += f"{i}. {supply_name[:30]} ({status})\n"
     
-    await callback.message.edit_text(
+    await _safe_edit(
+        callback.message,
         f"🎯 <b>Подтверждение мультибронирования</b>\n\n"
         f"Выбрано поставок: {len(selected_supplies)}\n\n"
         f"{supplies_text}\n"
@@ -571,17 +932,14 @@ async def start_multi_booking(callback: CallbackQuery, state: FSMContext):
         f"⚡ Бронирование будет происходить параллельно\n\n"
         f"Выберите параметры бронирования:",
         parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="📅 Выбрать дату", callback_data="multi_select_date")],
-            [InlineKeyboardButton(text="📊 Выбрать коэффициент", callback_data="multi_select_coefficient")],
-            [InlineKeyboardButton(text="🔥 Максимальный коэффициент", callback_data="multi_max_coefficient")],
-            [InlineKeyboardButton(text="⚡ Быстрое бронирование", callback_data="multi_quick_booking")],
-            [InlineKeyboardButton(text="⬅️ Назад к выбору", callback_data="multi_booking_mode")]
-        ])
+        reply_markup=_MULTI_BOOKING_OPTIONS_KB
     )
     
-    # Сохраняем выбранные поставки
-    await state.update_data(selected_supplies_for_booking=selected_supplies)
+    # Сохраняем выбранные поставки (выбор из кеша сессии сбрасываем в FSM)
+    await state.update_data(
+        selected_supplies_multi=sorted(selected_supplies_ids),
+        selected_supplies_for_booking=selected_supplies
+    )
 
 
 # Обработчики параметров мультибронирования
@@ -638,33 +996,24 @@ async def _execute_multi_booking(callback: CallbackQuery, state: FSMContext, boo
             booking_params["use_max_coefficient"] = True
         
         # Показываем уведомление о запуске
-        await callback.message.edit_text(
+        await _safe_edit(
+            callback.message,
             f"🚀 <b>Запускаю мультибронирование!</b>\n\n"
             f"📦 Поставок: {len(selected_supplies)}\n"
             f"🔥 Тип: {booking_type}\n\n"
             f"⏳ Создаю отдельные браузеры...",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
-            ])
+            reply_markup=_MAIN_MENU_KB
         )
         
         # Получаем синглтон менеджеры
-        from ...main import get_multi_booking_manager
-        multi_booking_manager = get_multi_booking_manager()
+        multi_booking_manager = _get_multi_booking_manager()
+        
+        # Создаем callback для уведомлений (не ждет Telegram, чтобы не тормозить бронирование)
+        progress_edit = LatestOnlyEdit(callback.message, _MAIN_MENU_KB)
         
-        # Создаем callback для уведомлений
         async def progress_callback(message: str):
-            try:
-                await callback.message.edit_text(
-                    f"🎯 <b>Мультибронирование</b>\n\n{message}",
-                    parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
-                    ])
-                )
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка обновления прогресса: {e}")
+            progress_edit.push(f"🎯 <b>Мультибронирование</b>\n\n{message}")
         
         # Запускаем мультибронирование
         session_id = await multi_booking_manager.start_multi_booking(
@@ -674,19 +1023,17 @@ async def _execute_multi_booking(callback: CallbackQuery, state: FSMContext, boo
             progress_callback=progress_callback
         )
         
-        logger.info(f"🎯 Запущено мультибронирование с session_id: {session_id}")
+        logger.info("🎯 Запущено мультибронирование с session_id: %s", session_id)
         
         # Сохраняем session_id в состоянии
         await state.update_data(multi_booking_session_id=session_id)
         
     except Exception as e:
-        logger.error(f"❌ Ошибка запуска мультибронирования: {e}")
-        await callback.message.edit_text(
+        logger.error("❌ Ошибка запуска мультибронирования: %s", e)
+        await _safe_edit(
+            callback.message,
             f"❌ <b>Ошибка мультибронирования</b>\n\n"
             f"<code>{str(e)}</code>",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="start_multi_booking")],
-                [InlineKeyboardButton(text="⬅️ Назад", callback_data="multi_booking_mode")]
-            ])
+            reply_markup=_MULTI_BOOKING_ERROR_KB
         )
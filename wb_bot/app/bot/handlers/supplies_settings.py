@@ -6,26 +6,50 @@ from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardBut
 from aiogram.fsm.context import FSMContext
 
 from ...utils.logger import get_logger
+from ...services.browser_manager import browser_manager
+from .booking_management import monitoring_sessions
 
 logger = get_logger(__name__)
 router = Router()
 
+# Статические тексты
+_SETTINGS_TEXT = (
+    "⚙️ <b>Настройки поставок</b>\n\n"
+    "🔔 <b>Уведомления:</b> Включены\n"
+    "🤖 <b>Автобронирование:</b> Включено\n"
+    "⏰ <b>Интервал проверки:</b> 60 сек\n\n"
+    "Выберите настройку для изменения:"
+)
+_NOTIFICATIONS_OFF_TEXT = (
+    "🔔 <b>Уведомления отключены</b>\n\n"
+    "❌ Уведомления о новых слотах: отключены\n"
+    "❌ Уведомления об успешном бронировании: отключены\n"
+    "❌ Уведомления об ошибках: отключены\n\n"
+    "<i>Функция в разработке - будет сохраняться в базу данных</i>"
+)
+
+# Статические клавиатуры (создаются один раз при импорте)
+_SETTINGS_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔔 Переключить уведомления", callback_data="toggle_notifications")],
+    [InlineKeyboardButton(text="🗑 Очистить все сессии", callback_data="clear_all_sessions")],
+    [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
+])
+_BACK_TO_SETTINGS_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅️ К настройкам", callback_data="supplies_settings")]
+])
+_SESSIONS_CLEARED_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📦 К поставкам", callback_data="view_supplies")],
+    [InlineKeyboardButton(text="⬅️ К настройкам", callback_data="supplies_settings")]
+])
+
 
 @router.callback_query(F.data == "supplies_settings")
 async def show_supplies_settings(callback: CallbackQuery, state: FSMContext):
     """Показывает настройки поставок."""
     await callback.message.edit_text(
-        f"⚙️ <b>Настройки поставок</b>\n\n"
-        f"🔔 <b>Уведомления:</b> Включены\n"
-        f"🤖 <b>Автобронирование:</b> Включено\n"
-        f"⏰ <b>Интервал проверки:</b> 60 сек\n\n"
-        f"Выберите настройку для изменения:",
+        _SETTINGS_TEXT,
         parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔔 Переключить уведомления", callback_data="toggle_notifications")],
-            [InlineKeyboardButton(text="🗑 Очистить все сессии", callback_data="clear_all_sessions")],
-            [InlineKeyboardButton(text="⬅️ К поставкам", callback_data="view_supplies")]
-        ])
+        reply_markup=_SETTINGS_KB
     )
 
 
@@ -33,15 +57,9 @@ async def show_supplies_settings(callback: CallbackQuery, state: FSMContext):
 async def toggle_notifications(callback: CallbackQuery):
     """Переключает уведомления."""
     await callback.message.edit_text(
-        f"🔔 <b>Уведомления отключены</b>\n\n"
-        f"❌ Уведомления о новых слотах: отключены\n"
-        f"❌ Уведомления об успешном бронировании: отключены\n"
-        f"❌ Уведомления об ошибках: отключены\n\n"
-        f"<i>Функция в разработке - будет сохраняться в базу данных</i>",
+        _NOTIFICATIONS_OFF_TEXT,
         parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="⬅️ К настройкам", callback_data="supplies_settings")]
-        ])
+        reply_markup=_BACK_TO_SETTINGS_KB
     )
 
 
@@ -51,25 +69,14 @@ async def clear_all_sessions(callback: CallbackQuery):
     user_id = callback.from_user.id
     
     try:
-        # Импортируем сессии из booking_management
-        from .booking_management import monitoring_sessions
-        from ...services.browser_manager import browser_manager
-        
         cleared_count = 0
         
-        # Останавливаем автобронирование
-        if user_id in monitoring_sessions:
-            monitoring_sessions[user_id]["status"] = "stopped"
-            del monitoring_sessions[user_id]
-            await browser_manager.close_browser(user_id)
-            cleared_count += 1
-        
-        # Останавливаем мониторинг
-        if user_id in monitoring_sessions:
-            session = monitoring_sessions[user_id]
+        # Останавливаем автобронирование и мониторинг (одна сессия на пользователя)
+        session = monitoring_sessions.pop(user_id, None)
+        if session is not None:
             session["status"] = "stopped"
-            del monitoring_sessions[user_id]
             cleared_count += 1
+            await browser_manager.close_browser(user_id)
         
         await callback.message.edit_text(
             f"✅ <b>Сессии очищены</b>\n\n"
@@ -77,10 +84,7 @@ async def clear_all_sessions(callback: CallbackQuery):
             f"✅ Все процессы автобронирования и мониторинга остановлены\n\n"
             f"Теперь можете запустить новые сессии.",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="📦 К поставкам", callback_data="view_supplies")],
-                [InlineKeyboardButton(text="⬅️ К настройкам", callback_data="supplies_settings")]
-            ])
+            reply_markup=_SESSIONS_CLEARED_KB
         )
     except Exception as e:
         logger.error(f"❌ Ошибка очистки сессий: {e}")
@@ -88,7 +92,5 @@ async def clear_all_sessions(callback: CallbackQuery):
             f"❌ <b>Ошибка очистки сессий</b>\n\n"
             f"Не удалось очистить сессии: {e}",
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⬅️ К настройкам", callback_data="supplies_settings")]
-            ])
+            reply_markup=_BACK_TO_SETTINGS_KB
         )
@@ -4,19 +4,25 @@ Wallet and payment handlers for the Telegram bot.
 Handles personal cabinet, balance management, payments and transaction history.
 """
 
+import asyncio
 import re
-from datetime import datetime
-from typing import Any, Dict, List
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from aiogram import F, Router
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.state import StatesGroup
 from aiogram.types import (
     CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 )
 
-from ...services.payment_service import payment_service
+from ..states import State
+from ..utils.message_edit import throttled_edit
+from ...config import get_settings
+from ...services.payment_service import payment_service, payment_status_poller
+from ...utils.decorators import warn_if_slow
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -25,85 +31,255 @@ logger = get_logger(__name__)
 router = Router()
 
 
+# Static keyboards (built once at import)
+_PAYMENTS_OFF_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
+])
+_WALLET_RETRY_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Повторить", callback_data="wallet_main")]
+])
+_DEPOSIT_CANCEL_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
+])
+_PAYMENT_RETRY_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="wallet_deposit")],
+    [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
+])
+_BACK_TO_WALLET_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
+])
+_PAYMENT_DONE_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="💰 К балансу", callback_data="wallet_main")],
+    [InlineKeyboardButton(text="🏠 В меню", callback_data="main_menu")]
+])
+_PAYMENT_CANCELED_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="💳 Новый платеж", callback_data="wallet_deposit")],
+    [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
+])
+_HISTORY_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔄 Обновить", callback_data="wallet_history")],
+    [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
+])
+
+
 class WalletStates(StatesGroup):
     """States for wallet operations."""
     entering_amount = State()
     confirming_payment = State()
 
 
+_settings = get_settings()
+
+
+def _payments_enabled() -> bool:
+    """Check whether the payment system is enabled."""
+    return _settings.payment.payment_enabled
+
+
+# Short-lived balance cache: user_id -> (fetched_at, balance_info)
+_BALANCE_TTL = 5.0
+_BALANCE_CACHE_MAX = 10_000
+_balance_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+# Balance fetches in progress: user_id -> future with balance_info
+_balance_inflight: Dict[int, "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _fresh_balance(user_id: int) -> Optional[Dict[str, Any]]:
+    """Return cached balance info if it is younger than _BALANCE_TTL."""
+    cached = _balance_cache.get(user_id)
+    if cached and time.monotonic() - cached[0] < _BALANCE_TTL:
+        return cached[1]
+    return None
+
+
+async def _cached_balance(user_id: int) -> Dict[str, Any]:
+    """
+    Get user balance info with a short TTL cache.
+    
+    Concurrent requests for the same user await the fetch already in flight.
+    """
+    balance_info = _fresh_balance(user_id)
+    if balance_info is not None:
+        return balance_info
+    
+    future = _balance_inflight.get(user_id)
+    if future is not None:
+        return await asyncio.shield(future)
+    
+    future = asyncio.get_running_loop().create_future()
+    _balance_inflight[user_id] = future
+    try:
+        balance_info = await payment_service.get_user_balance_info(user_id)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody may be waiting; mark the exception as retrieved
+        future.exception()
+        raise
+    else:
+        future.set_result(balance_info)
+    finally:
+        # The balance may have changed (and the entry dropped) while fetching
+        invalidated = _balance_inflight.get(user_id) is not future
+        if not invalidated:
+            del _balance_inflight[user_id]
+    
+    if invalidated:
+        return balance_info
+    if len(_balance_cache) >= _BALANCE_CACHE_MAX:
+        now = time.monotonic()
+        for uid in [uid for uid, (ts, _) in _balance_cache.items() if now - ts >= _BALANCE_TTL]:
+            del _balance_cache[uid]
+    _balance_cache[user_id] = (time.monotonic(), balance_info)
+    return balance_info
+
+
+def _invalidate_balance(user_id: int) -> None:
+    """Drop cached balance info (after the balance has changed)."""
+    _balance_cache.pop(user_id, None)
+    # A fetch already in flight may have read the old balance: don't let it be cached or shared
+    _balance_inflight.pop(user_id, None)
+
+
+# Top-ups and booking charges both go through payment_service
+payment_service.add_balance_listener(_invalidate_balance)
+
+
+# Per-user token bucket for refresh/history clicks: user_id -> (tokens, updated_at)
+_CLICK_RATE = 1.0
+_CLICK_BURST = 2.0
+_click_buckets: Dict[int, Tuple[float, float]] = {}
+
+
+def _take_click_token(user_id: int) -> bool:
+    """Take a click token for the user; False when the user clicks too often."""
+    now = time.monotonic()
+    tokens, updated_at = _click_buckets.get(user_id, (_CLICK_BURST, now))
+    tokens = min(_CLICK_BURST, tokens + (now - updated_at) * _CLICK_RATE)
+    allowed = tokens >= 1
+    _click_buckets[user_id] = (tokens - 1 if allowed else tokens, now)
+    
+    if len(_click_buckets) > _BALANCE_CACHE_MAX:
+        # Buckets idle long enough to be full again carry no state
+        idle = _CLICK_BURST / _CLICK_RATE
+        for uid in [uid for uid, (_, ts) in _click_buckets.items() if now - ts >= idle]:
+            del _click_buckets[uid]
+    return allowed
+
+
+def _click_limited(
+    handler: Callable[..., Awaitable[Any]]
+) -> Callable[..., Awaitable[Any]]:
+    """Skip the callback handler when the user exceeds the click rate."""
+    @wraps(handler)
+    async def wrapper(callback: CallbackQuery, *args: Any, **kwargs: Any) -> Any:
+        if not _take_click_token(callback.from_user.id):
+            await callback.answer("⏳ Слишком часто, подождите секунду")
+            return None
+        return await handler(callback, *args, **kwargs)
+    
+    return wrapper
+
+
+_BALANCE_TEMPLATE = (
+    "💰 <b>Ваш баланс: {balance:.2f} ₽</b>\n\n"
+    "📊 <b>Статистика:</b>\n"
+    "• Всего пополнено: {total_deposited:.2f} ₽\n"
+    "• Всего потрачено: {total_spent:.2f} ₽\n"
+    "• Бронирований: {bookings_count} шт.\n\n"
+    "💡 <b>Тарифы:</b>\n"
+    "• Одно бронирование: 10 ₽\n"
+    "• Минимальное пополнение: 500 ₽\n\n"
+).format_map
+_CAN_AFFORD_TEXT = "✅ Достаточно средств для бронирования"
+_CANNOT_AFFORD_TEXT = "❌ Недостаточно средств для бронирования"
+
+_NON_DIGITS = re.compile(r"\D+")
+_MAX_AMOUNT_INPUT_LEN = 32
+_AMOUNT_INVALID_TEXT = "❌ Некорректная сумма. Введите число от 500 до 50 000:"
+_AMOUNT_RANGE_TEXT = "❌ Сумма пополнения должна быть от 500 до 50 000 ₽"
+
+# Строки истории операций: amount, description, date_str, balance_after
+_TX_INCOME_TEMPLATE = "💰 <b>+{0:.2f} ₽</b>\n📝 {1}\n📅 {2}\n💰 Баланс: {3:.2f} ₽\n\n".format
+_TX_EXPENSE_TEMPLATE = "💸 <b>{0:.2f} ₽</b>\n📝 {1}\n📅 {2}\n💰 Баланс: {3:.2f} ₽\n\n".format
+
+_PAYMENTS_OFF_TEXT = (
+    "💰 <b>Платежная система отключена</b>\n\n"
+    "Все функции бота доступны бесплатно!\n"
+    "Бронируйте поставки без ограничений."
+)
+
+
 def format_balance_text(balance_info: Dict[str, Any]) -> str:
     """Format balance information text."""
-    return (
-        f"💰 <b>Ваш баланс: {balance_info['balance']:.2f} ₽</b>\n\n"
-        f"📊 <b>Статистика:</b>\n"
-        f"• Всего пополнено: {balance_info['total_deposited']:.2f} ₽\n"
-        f"• Всего потрачено: {balance_info['total_spent']:.2f} ₽\n"
-        f"• Бронирований: {balance_info['bookings_count']} шт.\n\n"
-        f"💡 <b>Тарифы:</b>\n"
-        f"• Одно бронирование: 10 ₽\n"
-        f"• Минимальное пополнение: 500 ₽\n\n"
-        f"{'✅ Достаточно средств для бронирования' if balance_info['can_afford_booking'] else '❌ Недостаточно средств для бронирования'}"
-    )
+    with warn_if_slow("format_balance_text"):
+        return _BALANCE_TEMPLATE(balance_info) + (
+            _CAN_AFFORD_TEXT if balance_info['can_afford_booking'] else _CANNOT_AFFORD_TEXT
+        )
+
+
+_WALLET_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="💳 Пополнить баланс", callback_data="wallet_deposit")],
+    [InlineKeyboardButton(text="📋 История операций", callback_data="wallet_history")],
+    [InlineKeyboardButton(text="🔄 Обновить", callback_data="wallet_refresh")],
+    [InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="main_menu")]
+])
 
 
 def get_wallet_keyboard() -> InlineKeyboardMarkup:
     """Get wallet main keyboard."""
-    return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="💳 Пополнить баланс", callback_data="wallet_deposit")],
-        [InlineKeyboardButton(text="📋 История операций", callback_data="wallet_history")],
-        [InlineKeyboardButton(text="🔄 Обновить", callback_data="wallet_refresh")],
-        [InlineKeyboardButton(text="⬅️ Назад в меню", callback_data="main_menu")]
-    ])
+    return _WALLET_KB
+
+
+_DEPOSIT_AMOUNTS_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="500 ₽", callback_data="deposit_amount:500"),
+        InlineKeyboardButton(text="1000 ₽", callback_data="deposit_amount:1000")
+    ],
+    [
+        InlineKeyboardButton(text="2000 ₽", callback_data="deposit_amount:2000"),
+        InlineKeyboardButton(text="5000 ₽", callback_data="deposit_amount:5000")
+    ],
+    [InlineKeyboardButton(text="10000 ₽", callback_data="deposit_amount:10000")],
+    [InlineKeyboardButton(text="💰 Другая сумма", callback_data="deposit_custom")],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="wallet_main")]
+])
 
 
 def get_deposit_amounts_keyboard() -> InlineKeyboardMarkup:
     """Get deposit amounts keyboard."""
-    amounts = [500, 1000, 2000, 5000, 10000]
-    buttons = []
-    
-    # Создаем кнопки с суммами по 2 в ряду
-    for i in range(0, len(amounts), 2):
-        row = []
-        for j in range(2):
-            if i + j < len(amounts):
-                amount = amounts[i + j]
-                row.append(InlineKeyboardButton(
-                    text=f"{amount} ₽",
-                    callback_data=f"deposit_amount:{amount}"
-                ))
-        buttons.append(row)
-    
-    # Добавляем кнопку "Другая сумма"
-    buttons.append([InlineKeyboardButton(text="💰 Другая сумма", callback_data="deposit_custom")])
-    buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="wallet_main")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return _DEPOSIT_AMOUNTS_KB
 
 
 @router.message(Command("wallet", "balance"))
 async def wallet_command(message: Message):
     """Handle wallet command."""
-    from ...config import get_settings
-    settings = get_settings()
-    
     # Если платежи отключены, показываем сообщение
-    if not settings.payment.payment_enabled:
+    if not _payments_enabled():
         await message.answer(
-            "💰 <b>Платежная система отключена</b>\n\n"
-            "Все функции бота доступны бесплатно!\n"
-            "Бронируйте поставки без ограничений.",
+            _PAYMENTS_OFF_TEXT,
             parse_mode="HTML"
         )
         return
     
     user_id = message.from_user.id
     
+    # Баланс уже в кеше - отвечаем сразу, без промежуточного сообщения
+    balance_info = _fresh_balance(user_id)
+    if balance_info is not None:
+        await message.answer(
+            format_balance_text(balance_info), parse_mode="HTML", reply_markup=get_wallet_keyboard()
+        )
+        return
+    
     # Показываем индикатор загрузки
     loading_msg = await message.answer("⏳ Загружаю информацию о балансе...")
     
     try:
         # Получаем информацию о балансе
-        balance_info = await payment_service.get_user_balance_info(user_id)
+        balance_info = await _cached_balance(user_id)
         
         text = format_balance_text(balance_info)
         keyboard = get_wallet_keyboard()
@@ -114,28 +290,20 @@ async def wallet_command(message: Message):
         logger.error(f"Error showing wallet for user {user_id}: {e}")
         await loading_msg.edit_text(
             "❌ Ошибка при загрузке информации о балансе. Попробуйте позже.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🔄 Повторить", callback_data="wallet_main")]
-            ])
+            reply_markup=_WALLET_RETRY_KB
         )
 
 
 @router.callback_query(F.data == "wallet_main")
 async def wallet_main_callback(callback: CallbackQuery):
     """Handle wallet main callback."""
-    from ...config import get_settings
-    settings = get_settings()
-    
     # Если платежи отключены, показываем сообщение
-    if not settings.payment.payment_enabled:
-        await callback.message.edit_text(
-            "💰 <b>Платежная система отключена</b>\n\n"
-            "Все функции бота доступны бесплатно!\n"
-            "Бронируйте поставки без ограничений.",
+    if not _payments_enabled():
+        await throttled_edit(
+            callback.message,
+            _PAYMENTS_OFF_TEXT,
             parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🏠 Главное меню", callback_data="main_menu")]
-            ])
+            reply_markup=_PAYMENTS_OFF_KB
         )
         await callback.answer()
         return
@@ -144,12 +312,12 @@ async def wallet_main_callback(callback: CallbackQuery):
     
     try:
         # Получаем информацию о балансе
-        balance_info = await payment_service.get_user_balance_info(user_id)
+        balance_info = await _cached_balance(user_id)
         
         text = format_balance_text(balance_info)
         keyboard = get_wallet_keyboard()
         
-        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+        await throttled_edit(callback.message, text, parse_mode="HTML", reply_markup=keyboard)
         await callback.answer()
         
     except Exception as e:
@@ -158,9 +326,10 @@ async def wallet_main_callback(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "wallet_refresh")
+@_click_limited
 async def wallet_refresh_callback(callback: CallbackQuery):
     """Handle wallet refresh callback."""
-    await callback.answer("🔄 Обновляю...")
+    # wallet_main_callback answers the callback itself
     await wallet_main_callback(callback)
 
 
@@ -185,7 +354,8 @@ async def wallet_deposit_callback(callback: CallbackQuery):
 async def deposit_amount_callback(callback: CallbackQuery, state: FSMContext):
     """Handle deposit amount selection."""
     amount = int(callback.data.split(":")[1])
-    await process_deposit_amount(callback, state, amount)
+    await process_deposit_amount(callback.message, state, amount)
+    await callback.answer()
 
 
 @router.callback_query(F.data == "deposit_custom")
@@ -197,9 +367,7 @@ async def deposit_custom_callback(callback: CallbackQuery, state: FSMContext):
         "Например: <code>1000</code>"
     )
     
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
-    ])
+    keyboard = _DEPOSIT_CANCEL_KB
     
     await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
     await state.set_state(WalletStates.entering_amount)
@@ -209,63 +377,30 @@ async def deposit_custom_callback(callback: CallbackQuery, state: FSMContext):
 @router.message(WalletStates.entering_amount)
 async def handle_custom_amount(message: Message, state: FSMContext):
     """Handle custom amount input."""
-    try:
-        # Извлекаем числа из сообщения
-        amount_text = re.sub(r'[^\d]', '', message.text)
-        if not amount_text:
-            await message.answer(
-                "❌ Некорректная сумма. Введите число от 500 до 50 000:",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
-                ])
-            )
-            return
-        
-        amount = int(amount_text)
-        
-        if amount < 500:
-            await message.answer(
-                "❌ Минимальная сумма пополнения: 500 ₽",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
-                ])
-            )
-            return
-        
-        if amount > 50000:
-            await message.answer(
-                "❌ Максимальная сумма пополнения: 50 000 ₽",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
-                ])
-            )
-            return
-        
-        # Создаем fake callback для процесса оплаты
-        class FakeCallback:
-            def __init__(self, message):
-                self.message = message
-                self.from_user = message.from_user
-            
-            async def answer(self, text="", show_alert=False):
-                pass
-        
-        fake_callback = FakeCallback(message)
-        await process_deposit_amount(fake_callback, state, amount)
-        
-    except ValueError:
-        await message.answer(
-            "❌ Некорректная сумма. Введите число от 500 до 50 000:",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
-            ])
-        )
+    # Обычно вводят просто число; иначе извлекаем цифры (слишком длинный ввод сразу отклоняем)
+    text = (message.text or "").strip()
+    if len(text) > _MAX_AMOUNT_INPUT_LEN:
+        amount_text = ""
+    elif text.isdecimal():
+        amount_text = text
+    else:
+        amount_text = _NON_DIGITS.sub("", text)
+    if not amount_text:
+        await message.answer(_AMOUNT_INVALID_TEXT, reply_markup=_DEPOSIT_CANCEL_KB)
+        return
+    
+    # В строке остались только цифры, int() здесь не падает
+    amount = int(amount_text)
+    if not 500 <= amount <= 50000:
+        await message.answer(_AMOUNT_RANGE_TEXT, reply_markup=_DEPOSIT_CANCEL_KB)
+        return
+    
+    # Сообщение пользователя отредактировать нельзя - отвечаем новым
+    await process_deposit_amount(message, state, amount, edit=False)
 
 
-async def process_deposit_amount(callback: CallbackQuery, state: FSMContext, amount: int):
-    """Process deposit amount and create payment."""
-    user_id = callback.from_user.id
-    
+async def process_deposit_amount(message: Message, state: FSMContext, amount: int, edit: bool = True):
+    """Show deposit confirmation by editing `message` (or answering it when edit is False)."""
     # Показываем подтверждение
     text = (
         f"💳 <b>Подтверждение пополнения</b>\n\n"
@@ -280,7 +415,10 @@ async def process_deposit_amount(callback: CallbackQuery, state: FSMContext, amo
         [InlineKeyboardButton(text="❌ Отмена", callback_data="wallet_deposit")]
     ])
     
-    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+    if edit:
+        await message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+    else:
+        await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
     await state.clear()
 
 
@@ -291,7 +429,8 @@ async def confirm_payment_callback(callback: CallbackQuery):
     user_id = callback.from_user.id
     
     # Показываем процесс создания платежа
-    await callback.message.edit_text(
+    await throttled_edit(
+        callback.message,
         "⏳ Создаю ссылку для оплаты...",
         parse_mode="HTML"
     )
@@ -305,6 +444,9 @@ async def confirm_payment_callback(callback: CallbackQuery):
         )
         
         if success and payment:
+            # Начинаем опрашивать статус сразу, чтобы к проверке он уже был известен
+            payment_status_poller.watch(payment.yookassa_payment_id)
+            
             text = (
                 f"💳 <b>Ссылка для оплаты создана</b>\n\n"
                 f"💰 Сумма: <b>{amount} ₽</b>\n"
@@ -319,27 +461,24 @@ async def confirm_payment_callback(callback: CallbackQuery):
                 [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
             ])
             
-            await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+            await throttled_edit(callback.message, text, parse_mode="HTML", reply_markup=keyboard)
             
         else:
-            await callback.message.edit_text(
+            await throttled_edit(
+                callback.message,
                 f"❌ <b>Ошибка создания платежа</b>\n\n{error}",
                 parse_mode="HTML",
-                reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text="🔄 Попробовать снова", callback_data="wallet_deposit")],
-                    [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-                ])
+                reply_markup=_PAYMENT_RETRY_KB
             )
         
         await callback.answer()
         
     except Exception as e:
         logger.error(f"Error creating payment for user {user_id}: {e}")
-        await callback.message.edit_text(
+        await throttled_edit(
+            callback.message,
             "❌ Произошла ошибка при создании платежа. Попробуйте позже.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-            ])
+            reply_markup=_BACK_TO_WALLET_KB
         )
         await callback.answer()
 
@@ -352,8 +491,8 @@ async def check_payment_callback(callback: CallbackQuery):
     await callback.answer("🔄 Проверяю статус платежа...")
     
     try:
-        # Проверяем статус платежа
-        success, status, error = await payment_service.check_payment_status(payment_id)
+        # Статус берем из фонового опроса (ждем итоговый не дольше пары секунд)
+        success, status, error = await payment_status_poller.get_status(payment_id)
         
         if success and status:
             if status.value == "succeeded":
@@ -361,8 +500,8 @@ async def check_payment_callback(callback: CallbackQuery):
                 processed, process_error = await payment_service.process_successful_payment(payment_id)
                 
                 if processed:
-                    # Получаем обновленный баланс
-                    balance_info = await payment_service.get_user_balance_info(callback.from_user.id)
+                    # Кеш баланса сброшен в process_successful_payment
+                    balance_info = await _cached_balance(callback.from_user.id)
                     
                     text = (
                         f"✅ <b>Платеж успешно обработан!</b>\n\n"
@@ -370,32 +509,26 @@ async def check_payment_callback(callback: CallbackQuery):
                         f"Спасибо за пополнение!"
                     )
                     
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="💰 К балансу", callback_data="wallet_main")],
-                        [InlineKeyboardButton(text="🏠 В меню", callback_data="main_menu")]
-                    ])
+                    keyboard = _PAYMENT_DONE_KB
                     
-                    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+                    await throttled_edit(callback.message, text, parse_mode="HTML", reply_markup=keyboard)
                     
                 else:
-                    await callback.message.edit_text(
+                    await throttled_edit(
+                        callback.message,
                         f"❌ Ошибка обработки платежа: {process_error}",
-                        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-                        ])
+                        reply_markup=_BACK_TO_WALLET_KB
                     )
                     
             elif status.value == "pending":
                 await callback.answer("⏳ Платеж еще в обработке", show_alert=True)
                 
             elif status.value == "canceled":
-                await callback.message.edit_text(
+                await throttled_edit(
+                    callback.message,
                     "❌ <b>Платеж отменен</b>\n\nВы можете создать новый платеж.",
                     parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                        [InlineKeyboardButton(text="💳 Новый платеж", callback_data="wallet_deposit")],
-                        [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-                    ])
+                    reply_markup=_PAYMENT_CANCELED_KB
                 )
                 
             else:
@@ -409,6 +542,7 @@ async def check_payment_callback(callback: CallbackQuery):
 
 
 @router.callback_query(F.data == "wallet_history")
+@_click_limited
 async def wallet_history_callback(callback: CallbackQuery):
     """Handle wallet history callback."""
     user_id = callback.from_user.id
@@ -426,28 +560,17 @@ async def wallet_history_callback(callback: CallbackQuery):
                 "💡 Пополните баланс, чтобы начать использовать бота!"
             )
         else:
-            text = "📋 <b>История операций</b>\n\n"
-            
-            for tx in transactions:
-                date = datetime.fromisoformat(tx['created_at'].replace('Z', '+00:00'))
-                date_str = date.strftime("%d.%m.%Y %H:%M")
-                
-                if tx['amount'] > 0:
-                    emoji = "💰"
-                    amount_str = f"+{tx['amount']:.2f} ₽"
-                else:
-                    emoji = "💸"
-                    amount_str = f"{tx['amount']:.2f} ₽"
-                
-                text += f"{emoji} <b>{amount_str}</b>\n"
-                text += f"📝 {tx['description']}\n"
-                text += f"📅 {date_str}\n"
-                text += f"💰 Баланс: {tx['balance_after']:.2f} ₽\n\n"
+            with warn_if_slow("wallet_history"):
+                parts = ["📋 <b>История операций</b>\n\n"]
+                for tx in transactions:
+                    # Пополнения с плюсом и 💰, списания как есть и 💸
+                    template = _TX_INCOME_TEMPLATE if tx['amount'] > 0 else _TX_EXPENSE_TEMPLATE
+                    parts.append(template(
+                        tx['amount'], tx['description'], tx['date_str'], tx['balance_after']
+                    ))
+                text = "".join(parts)
         
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🔄 Обновить", callback_data="wallet_history")],
-            [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-        ])
+        keyboard = _HISTORY_KB
         
         await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
         
@@ -455,9 +578,7 @@ async def wallet_history_callback(callback: CallbackQuery):
         logger.error(f"Error showing wallet history for user {user_id}: {e}")
         await callback.message.edit_text(
             "❌ Ошибка при загрузке истории операций.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⬅️ К балансу", callback_data="wallet_main")]
-            ])
+            reply_markup=_BACK_TO_WALLET_KB
         )
 
 
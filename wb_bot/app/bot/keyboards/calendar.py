@@ -6,12 +6,15 @@ date ranges with navigation and proper validation.
 """
 
 import calendar
+import time
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Optional, Tuple, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, Tuple, List, Dict, Any, Union
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.filters import Filter
 from aiogram.filters.callback_data import CallbackData
-from pydantic import BaseModel
 
 from ...utils.logger import get_logger
 
@@ -26,13 +29,146 @@ class CalendarCallback(CallbackData, prefix="cal"):
     day: int = 0  # 0 for navigation actions
 
 
-class DateSelection(BaseModel):
-    """Model for tracking date selection state."""
-    start_date: Optional[date] = None
-    end_date: Optional[date] = None
+def parse_fast(data: str) -> Optional[Tuple[str, int, int, int]]:
+    """
+    Parse packed CalendarCallback data ("cal:action:year:month:day") without pydantic.
+    
+    Returns:
+        (action, year, month, day) or None if data is not a calendar callback
+    """
+    parts = data.split(":")
+    if len(parts) != 5 or parts[0] != "cal":
+        return None
+    try:
+        return parts[1], int(parts[2]), int(parts[3]), int(parts[4])
+    except ValueError:
+        return None
+
+
+class CalendarFilter(Filter):
+    """
+    Lightweight replacement for CalendarCallback.filter().
+    
+    Parses callback data with parse_fast and passes an unvalidated
+    CalendarCallback to the handler as callback_data.
+    """
+    
+    async def __call__(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        data = callback.data
+        if not data or not data.startswith("cal:"):
+            return False
+        parsed = parse_fast(data)
+        if parsed is None:
+            return False
+        action, year, month, day = parsed
+        return {
+            "callback_data": CalendarCallback.model_construct(
+                action=action, year=year, month=month, day=day
+            )
+        }
+
+
+# (local midnight timestamp when it expires, today)
+_today_cache: Tuple[float, date] = (0.0, date.min)
+
+
+def _today() -> date:
+    """date.today(), recomputed only once the local day is over."""
+    global _today_cache
+    expires_at, today = _today_cache
+    if time.time() >= expires_at:
+        today = date.today()
+        tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_cache = (tomorrow.timestamp(), today)
+    return today
+
+
+# Day number texts, indexed by day of month
+_DAY_STR = [""] + [str(day) for day in range(1, 32)]
+_PAST_DAY_STR = [""] + [f"·{day}·" for day in range(1, 32)]
+
+
+@lru_cache(maxsize=4096)
+def _pack(action: str, year: int, month: int, day: int = 0) -> str:
+    """Packed CalendarCallback (the set of values is small, so it is memoized)."""
+    return CalendarCallback(action=action, year=year, month=month, day=day).pack()
+
+
+@lru_cache(maxsize=512)
+def _month_grid(year: int, month: int) -> Tuple[Tuple[int, ...], ...]:
+    """Monday-first weeks of the month, 0 for days outside it."""
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    cells = [0] * first_weekday + list(range(1, days_in_month + 1))
+    cells += [0] * (-len(cells) % 7)
+    return tuple(tuple(cells[i:i + 7]) for i in range(0, len(cells), 7))
+
+
+@lru_cache(maxsize=256)
+def _build_month_skeleton(
+    year: int,
+    month: int,
+    today_ordinal: int
+) -> Tuple[Tuple[Tuple[int, str, str], ...], ...]:
+    """
+    Build the selection-independent part of a month grid.
+    
+    Returns weeks of (day, text, callback_data) cells. Day is 0 for cells
+    that cannot be selected (other months and past dates). Only strings are
+    cached, buttons are created per render.
+    """
+    first_ord = date(year, month, 1).toordinal() - 1
+    # Same string as _pack("select", year, month, day), without a model per day
+    select_prefix = f"cal:select:{year}:{month}:"
+    weeks = []
+    for week in _month_grid(year, month):
+        cells = []
+        for day in week:
+            if day == 0:
+                # Empty cell for days from other months
+                cells.append((0, " ", "ignore"))
+                continue
+            
+            current_ord = first_ord + day
+            if current_ord < today_ordinal:
+                # Past dates are disabled
+                cells.append((0, _PAST_DAY_STR[day], "ignore"))
+                continue
+            
+            text = DateRangeCalendar.EMOJI_TODAY + _DAY_STR[day] if current_ord == today_ordinal else _DAY_STR[day]
+            callback_data = select_prefix + _DAY_STR[day]
+            cells.append((day, text, callback_data))
+        weeks.append(tuple(cells))
+    return tuple(weeks)
+
+
+@lru_cache(maxsize=128)
+def _header_label(year: int, month: int) -> str:
+    """Month/year title of the calendar header."""
+    return f"{DateRangeCalendar.MONTHS_RU[month - 1]} {year}"
+
+
+@lru_cache(maxsize=1024)
+def _status_text(start_date: Optional[date], end_date: Optional[date]) -> str:
+    """Status row text for a selection (navigation re-renders hit the cache)."""
+    if not start_date:
+        return "📅 Выберите начальную дату"
+    elif not end_date:
+        return f"📅 Начало: {start_date.strftime('%d.%m.%Y')}\n📅 Выберите конечную дату"
+    else:
+        days_diff = (end_date - start_date).days + 1
+        return (f"📅 Период: {start_date.strftime('%d.%m.%Y')} - "
+               f"{end_date.strftime('%d.%m.%Y')} ({days_diff} дн.)")
+
+
+@dataclass(slots=True)
+class DateSelection:
+    """In-memory date selection state of one user."""
     current_year: int
     current_month: int
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
     selecting_start: bool = True  # True for start date, False for end date
+    updated_at: float = 0.0  # time.monotonic() of the last render
 
 
 class DateRangeCalendar:
@@ -55,6 +191,10 @@ class DateRangeCalendar:
     
     WEEKDAYS_RU = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
     
+    # Buttons identical for every render (buttons are plain data, safe to share)
+    _WEEKDAY_ROW = [InlineKeyboardButton(text=day, callback_data="ignore") for day in WEEKDAYS_RU]
+    _EMPTY_CELL = InlineKeyboardButton(text=" ", callback_data="ignore")
+    
     # Emoji for visual enhancement
     EMOJI_SELECTED_START = "🟩"  # Start date
     EMOJI_SELECTED_END = "🟥"    # End date
@@ -65,9 +205,30 @@ class DateRangeCalendar:
     EMOJI_CONFIRM = "✅"         # Confirm selection
     EMOJI_CANCEL = "❌"          # Cancel
     
+    # Abandoned selections (no confirm/cancel) are dropped after this many seconds
+    SELECTION_TTL = 3600
+    SWEEP_INTERVAL = 300
+    
     def __init__(self):
         """Initialize calendar."""
         self.selections: Dict[int, DateSelection] = {}  # user_id -> DateSelection
+        # user_id -> ((year, month, today_ordinal), day grid rows) of the last render
+        self._last_kb: Dict[int, Tuple[Tuple[int, int, int], List[List[InlineKeyboardButton]]]] = {}
+        self._next_sweep = 0.0
+    
+    def _sweep_stale_selections(self, now: float) -> None:
+        """Drop selections not rendered for SELECTION_TTL seconds (at most once per SWEEP_INTERVAL)."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        
+        cutoff = now - self.SELECTION_TTL
+        stale = [uid for uid, selection in self.selections.items() if selection.updated_at < cutoff]
+        for uid in stale:
+            del self.selections[uid]
+            self._last_kb.pop(uid, None)
+        if stale:
+            logger.debug(f"Dropped {len(stale)} stale calendar selections")
     
     def get_calendar_keyboard(
         self,
@@ -87,21 +248,24 @@ class DateRangeCalendar:
         Returns:
             InlineKeyboardMarkup with calendar
         """
-        today = date.today()
+        today = _today()
         year = year or today.year
         month = month or today.month
         
         # Initialize or update selection state
-        if user_id not in self.selections:
-            self.selections[user_id] = DateSelection(
+        selection = self.selections.get(user_id)
+        if selection is None:
+            selection = self.selections[user_id] = DateSelection(
                 current_year=year,
                 current_month=month
             )
         else:
-            self.selections[user_id].current_year = year
-            self.selections[user_id].current_month = month
+            selection.current_year = year
+            selection.current_month = month
         
-        selection = self.selections[user_id]
+        now = time.monotonic()
+        selection.updated_at = now
+        self._sweep_stale_selections(now)
         
         # Create keyboard
         keyboard = []
@@ -110,82 +274,66 @@ class DateRangeCalendar:
         header_row = [
             InlineKeyboardButton(
                 text=f"{self.EMOJI_PREV}",
-                callback_data=CalendarCallback(
-                    action="nav_prev",
-                    year=year,
-                    month=month
-                ).pack()
+                callback_data=_pack("nav_prev", year, month)
             ),
             InlineKeyboardButton(
-                text=f"{self.MONTHS_RU[month-1]} {year}",
+                text=_header_label(year, month),
                 callback_data="ignore"
             ),
             InlineKeyboardButton(
                 text=f"{self.EMOJI_NEXT}",
-                callback_data=CalendarCallback(
-                    action="nav_next",
-                    year=year,
-                    month=month
-                ).pack()
+                callback_data=_pack("nav_next", year, month)
             )
         ]
         keyboard.append(header_row)
         
         # Weekday headers
-        weekday_row = [
-            InlineKeyboardButton(text=day, callback_data="ignore")
-            for day in self.WEEKDAYS_RU
-        ]
-        keyboard.append(weekday_row)
+        keyboard.append(list(self._WEEKDAY_ROW))
+        
+        # Calendar days: cached month grid with the current selection on top
+        grid_key = (year, month, today.toordinal())
+        skeleton = _build_month_skeleton(*grid_key)
+        
+        # Re-render of the same month: buttons whose text did not change are reused
+        last = self._last_kb.get(user_id)
+        prev_rows = last[1] if last and last[0] == grid_key else None
+        grid_rows = []
         
-        # Calendar days
-        cal = calendar.monthcalendar(year, month)
+        # Selection bounds as ordinals: the cells are compared as plain ints
+        first_ord = date(year, month, 1).toordinal() - 1
+        start_ord = selection.start_date.toordinal() if selection.start_date else 0
+        end_ord = selection.end_date.toordinal() if selection.end_date else 0
+        has_range = bool(start_ord and end_ord)
         
-        for week in cal:
+        for w, week in enumerate(skeleton):
             week_row = []
-            for day in week:
-                if day == 0:
-                    # Empty cell for days from other months
-                    week_row.append(
-                        InlineKeyboardButton(text=" ", callback_data="ignore")
-                    )
-                else:
-                    current_date = date(year, month, day)
-                    
-                    # Determine button appearance
-                    text = str(day)
+            prev_row = prev_rows[w] if prev_rows else None
+            for c, (day, text, callback_data) in enumerate(week):
+                if day:
+                    current_ord = first_ord + day
                     
                     # Check if this date is selected
-                    if selection.start_date == current_date:
-                        text = f"{self.EMOJI_SELECTED_START}{day}"
-                    elif selection.end_date == current_date:
-                        text = f"{self.EMOJI_SELECTED_END}{day}"
-                    elif (selection.start_date and selection.end_date and
-                          selection.start_date < current_date < selection.end_date):
-                        text = f"{self.EMOJI_IN_RANGE}{day}"
-                    elif current_date == today:
-                        text = f"{self.EMOJI_TODAY}{day}"
-                    
-                    # Disable past dates
-                    if current_date < today:
-                        week_row.append(
-                            InlineKeyboardButton(text=f"·{day}·", callback_data="ignore")
-                        )
-                    else:
-                        week_row.append(
-                            InlineKeyboardButton(
-                                text=text,
-                                callback_data=CalendarCallback(
-                                    action="select",
-                                    year=year,
-                                    month=month,
-                                    day=day
-                                ).pack()
-                            )
-                        )
+                    if current_ord == start_ord:
+                        text = self.EMOJI_SELECTED_START + _DAY_STR[day]
+                    elif current_ord == end_ord:
+                        text = self.EMOJI_SELECTED_END + _DAY_STR[day]
+                    elif has_range and start_ord < current_ord < end_ord:
+                        text = self.EMOJI_IN_RANGE + _DAY_STR[day]
+                elif text == " ":
+                    # Empty cell for days from other months
+                    week_row.append(self._EMPTY_CELL)
+                    continue
+                
+                if prev_row is not None and prev_row[c].text == text:
+                    week_row.append(prev_row[c])
+                else:
+                    week_row.append(InlineKeyboardButton(text=text, callback_data=callback_data))
             
+            grid_rows.append(week_row)
             keyboard.append(week_row)
         
+        self._last_kb[user_id] = (grid_key, grid_rows)
+        
         # Status and action buttons
         status_text = self._get_status_text(selection)
         keyboard.append([
@@ -199,22 +347,14 @@ class DateRangeCalendar:
             action_row.append(
                 InlineKeyboardButton(
                     text=f"{self.EMOJI_CONFIRM} Подтвердить",
-                    callback_data=CalendarCallback(
-                        action="confirm",
-                        year=year,
-                        month=month
-                    ).pack()
+                    callback_data=_pack("confirm", year, month)
                 )
             )
         
         action_row.append(
             InlineKeyboardButton(
                 text=f"{self.EMOJI_CANCEL} Отмена",
-                callback_data=CalendarCallback(
-                    action="cancel",
-                    year=year,
-                    month=month
-                ).pack()
+                callback_data=_pack("cancel", year, month)
             )
         )
         
@@ -225,14 +365,7 @@ class DateRangeCalendar:
     
     def _get_status_text(self, selection: DateSelection) -> str:
         """Get status text for current selection."""
-        if not selection.start_date:
-            return "📅 Выберите начальную дату"
-        elif not selection.end_date:
-            return f"📅 Начало: {selection.start_date.strftime('%d.%m.%Y')}\n📅 Выберите конечную дату"
-        else:
-            days_diff = (selection.end_date - selection.start_date).days + 1
-            return (f"📅 Период: {selection.start_date.strftime('%d.%m.%Y')} - "
-                   f"{selection.end_date.strftime('%d.%m.%Y')} ({days_diff} дн.)")
+        return _status_text(selection.start_date, selection.end_date)
     
     def handle_calendar_callback(
         self,
@@ -325,6 +458,7 @@ class DateRangeCalendar:
                 result_dates = (selection.start_date, selection.end_date)
                 # Clear selection for this user
                 del self.selections[user_id]
+                self._last_kb.pop(user_id, None)
                 return "Период выбран успешно!", None, result_dates
             else:
                 return "Ошибка: не все даты выбраны", None, None
@@ -333,6 +467,7 @@ class DateRangeCalendar:
             # Cancel selection
             if user_id in self.selections:
                 del self.selections[user_id]
+            self._last_kb.pop(user_id, None)
             return "Выбор дат отменен", None, None
         
         return "Неизвестное действие", None, None
@@ -345,6 +480,7 @@ class DateRangeCalendar:
         """Clear selection state for user."""
         if user_id in self.selections:
             del self.selections[user_id]
+        self._last_kb.pop(user_id, None)
     
     def validate_date_range(self, start_date: date, end_date: date) -> Tuple[bool, str]:
         """
@@ -357,7 +493,7 @@ class DateRangeCalendar:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        today = date.today()
+        today = _today()
         
         if start_date < today:
             return False, "Начальная дата не может быть в прошлом"
@@ -5,50 +5,134 @@ This module provides all inline keyboards for the bot's user interface
 with proper callback handling and responsive design.
 """
 
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, List, Optional, Type
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters.callback_data import CallbackData
+from pydantic import ConfigDict
 
 from ...database.models import MonitoringTask, APIKey, SupplyType, DeliveryType, MonitoringMode
+from ..utils.markup_cache import freeze_markup
 
 
 class RedistributionCallback(CallbackData, prefix="redistrib"):
     """Callback data for redistribution actions."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # start, cancel, back
 
 
 class WarehouseCallback(CallbackData, prefix="warehouse"):
     """Callback data for warehouse selection."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # source, destination, select
     warehouse_id: str
 
 
 class MainMenuCallback(CallbackData, prefix="main"):
     """Main menu callback data."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # monitoring, api_keys, settings, help, stats
 
 
 class MonitoringCallback(CallbackData, prefix="monitor"):
     """Monitoring callback data."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # create, list, edit, delete, pause, resume
     task_id: int = 0
 
 
 class APIKeyCallback(CallbackData, prefix="apikey"):
     """API key callback data."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # add, list, delete, validate, confirm_delete
     key_id: int = 0
 
 
 class SettingsCallback(CallbackData, prefix="settings"):
     """Settings callback data."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # interval, coefficient, supply_type, delivery_type, mode
     value: str = ""
 
 
-def get_main_menu() -> InlineKeyboardMarkup:
+class SupplySelectCallback(CallbackData, prefix="ss"):
+    """Supply selection callback data (compact: id encoded with encode_supply_id)."""
+    model_config = ConfigDict(frozen=True)
+    
+    sid: str
+
+
+class MultiToggleCallback(CallbackData, prefix="mt"):
+    """Multi-booking supply toggle callback data (compact: id encoded with encode_supply_id)."""
+    model_config = ConfigDict(frozen=True)
+    
+    sid: str
+
+
+@lru_cache(maxsize=512)
+def _pack(cls: Type[CallbackData], **fields: Any) -> str:
+    """Packed callback data (keyboards reuse a small set of values, so it is memoized)."""
+    return cls(**fields).pack()
+
+
+@lru_cache(maxsize=4096)
+def _fmt_ddmm(value) -> str:
+    """Date as dd.mm (task lists repeat the same few dates)."""
+    return value.strftime('%d.%m')
+
+
+# (is_active, is_paused) -> status emoji of a monitoring task
+_TASK_STATUS_EMOJI = {
+    (True, False): "🟢",
+    (True, True): "🔴",
+    (False, True): "🔴",
+    (False, False): "⚪",
+}
+_TASK_MODE_EMOJI = {
+    MonitoringMode.AUTO_BOOKING: "🤖",
+    MonitoringMode.AUTO_BOOKING.value: "🤖",
+}
+
+
+_BASE36_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def encode_supply_id(supply_id) -> str:
+    """
+    Encode supply ID for callback data.
+    
+    Canonical numeric IDs are written in base36, others are kept as is
+    with "_" prefix.
     """
-    Get main menu keyboard.
+    raw = str(supply_id)
+    if not raw.isdigit() or raw != str(int(raw)):
+        return f"_{raw}"
+    
+    number = int(raw)
+    encoded = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = _BASE36_DIGITS[remainder] + encoded
+        if not number:
+            return encoded
+
+
+def decode_supply_id(token: str) -> str:
+    """Decode supply ID packed with encode_supply_id."""
+    if token.startswith("_"):
+        return token[1:]
+    return str(int(token, 36))
+
+
+def _build_main_menu() -> InlineKeyboardMarkup:
+    """
+    Build main menu keyboard.
     
     Returns:
         Main menu keyboard
@@ -57,7 +141,7 @@ def get_main_menu() -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="📊 Мониторинг слотов",
-                callback_data=MainMenuCallback(action="monitoring").pack()
+                callback_data=_pack(MainMenuCallback, action="monitoring")
             ),
             InlineKeyboardButton(
                 text="🤖 Автобронирование",
@@ -81,13 +165,13 @@ def get_main_menu() -> InlineKeyboardMarkup:
             ),
             InlineKeyboardButton(
                 text="🔑 API ключи",
-                callback_data=MainMenuCallback(action="api_keys").pack()
+                callback_data=_pack(MainMenuCallback, action="api_keys")
             ),
         ],
         [
             InlineKeyboardButton(
                 text="❓ Помощь",
-                callback_data=MainMenuCallback(action="help").pack()
+                callback_data=_pack(MainMenuCallback, action="help")
             )
         ]
     ]
@@ -95,9 +179,17 @@ def get_main_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_monitoring_menu() -> InlineKeyboardMarkup:
+_MAIN_MENU = freeze_markup(_build_main_menu())
+
+
+def get_main_menu() -> InlineKeyboardMarkup:
+    """Get main menu keyboard."""
+    return _MAIN_MENU
+
+
+def _build_monitoring_menu() -> InlineKeyboardMarkup:
     """
-    Get monitoring menu keyboard.
+    Build monitoring menu keyboard.
     
     Returns:
         Monitoring menu keyboard
@@ -106,19 +198,19 @@ def get_monitoring_menu() -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="➕ Создать мониторинг",
-                callback_data=MonitoringCallback(action="create").pack()
+                callback_data=_pack(MonitoringCallback, action="create")
             )
         ],
         [
             InlineKeyboardButton(
                 text="📋 Мои мониторинги",
-                callback_data=MonitoringCallback(action="list").pack()
+                callback_data=_pack(MonitoringCallback, action="list")
             )
         ],
         [
             InlineKeyboardButton(
                 text="🔙 Главное меню",
-                callback_data=MainMenuCallback(action="main").pack()
+                callback_data=_pack(MainMenuCallback, action="main")
             )
         ]
     ]
@@ -126,6 +218,22 @@ def get_monitoring_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+_MONITORING_MENU = freeze_markup(_build_monitoring_menu())
+
+
+def get_monitoring_menu() -> InlineKeyboardMarkup:
+    """Get monitoring menu keyboard."""
+    return _MONITORING_MENU
+
+
+def _task_button_text(task: MonitoringTask) -> str:
+    """Text of a task row in the monitoring list."""
+    status_emoji = _TASK_STATUS_EMOJI[(bool(task.is_active), bool(task.is_paused))]
+    mode_emoji = _TASK_MODE_EMOJI.get(task.monitoring_mode, "🔔")
+    return (f"{status_emoji}{mode_emoji} {task.warehouse_name} "
+            f"({_fmt_ddmm(task.date_from)} - {_fmt_ddmm(task.date_to)})")
+
+
 def get_monitoring_list_keyboard(tasks: List[MonitoringTask]) -> InlineKeyboardMarkup:
     """
     Get keyboard for monitoring tasks list.
@@ -136,27 +244,21 @@ def get_monitoring_list_keyboard(tasks: List[MonitoringTask]) -> InlineKeyboardM
     Returns:
         Keyboard with task list
     """
-    keyboard = []
-    
-    for task in tasks:
-        status_emoji = "🟢" if task.is_active and not task.is_paused else "🔴" if task.is_paused else "⚪"
-        mode_emoji = "🤖" if task.monitoring_mode == "auto_booking" else "🔔"
-        
-        task_text = (f"{status_emoji}{mode_emoji} {task.warehouse_name} "
-                    f"({task.date_from.strftime('%d.%m')} - {task.date_to.strftime('%d.%m')})")
-        
-        keyboard.append([
+    keyboard = [
+        [
             InlineKeyboardButton(
-                text=task_text,
-                callback_data=MonitoringCallback(action="edit", task_id=task.id).pack()
+                text=_task_button_text(task),
+                callback_data=_pack(MonitoringCallback, action="edit", task_id=task.id)
             )
-        ])
+        ]
+        for task in tasks
+    ]
     
     # Navigation buttons
     keyboard.append([
         InlineKeyboardButton(
             text="🔙 Назад",
-            callback_data=MonitoringCallback(action="back").pack()
+            callback_data=_pack(MonitoringCallback, action="back")
         )
     ])
     
@@ -180,14 +282,14 @@ def get_monitoring_task_keyboard(task: MonitoringTask) -> InlineKeyboardMarkup:
         keyboard.append([
             InlineKeyboardButton(
                 text="⏸ Приостановить",
-                callback_data=MonitoringCallback(action="pause", task_id=task.id).pack()
+                callback_data=_pack(MonitoringCallback, action="pause", task_id=task.id)
             )
         ])
     elif task.is_paused:
         keyboard.append([
             InlineKeyboardButton(
                 text="▶️ Возобновить",
-                callback_data=MonitoringCallback(action="resume", task_id=task.id).pack()
+                callback_data=_pack(MonitoringCallback, action="resume", task_id=task.id)
             )
         ])
     
@@ -195,11 +297,11 @@ def get_monitoring_task_keyboard(task: MonitoringTask) -> InlineKeyboardMarkup:
     keyboard.append([
         InlineKeyboardButton(
             text="✏️ Изменить",
-            callback_data=MonitoringCallback(action="edit_settings", task_id=task.id).pack()
+            callback_data=_pack(MonitoringCallback, action="edit_settings", task_id=task.id)
         ),
         InlineKeyboardButton(
             text="🗑 Удалить",
-            callback_data=MonitoringCallback(action="delete", task_id=task.id).pack()
+            callback_data=_pack(MonitoringCallback, action="delete", task_id=task.id)
         )
     ])
     
@@ -207,16 +309,16 @@ def get_monitoring_task_keyboard(task: MonitoringTask) -> InlineKeyboardMarkup:
     keyboard.append([
         InlineKeyboardButton(
             text="🔙 К списку",
-            callback_data=MonitoringCallback(action="list").pack()
+            callback_data=_pack(MonitoringCallback, action="list")
         )
     ])
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_api_keys_menu() -> InlineKeyboardMarkup:
+def _build_api_keys_menu() -> InlineKeyboardMarkup:
     """
-    Get API keys menu keyboard.
+    Build API keys menu keyboard.
     
     Returns:
         API keys menu keyboard
@@ -225,25 +327,25 @@ def get_api_keys_menu() -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="➕ Добавить API ключ",
-                callback_data=APIKeyCallback(action="add").pack()
+                callback_data=_pack(APIKeyCallback, action="add")
             )
         ],
         [
             InlineKeyboardButton(
                 text="📋 Мои ключи",
-                callback_data=APIKeyCallback(action="list").pack()
+                callback_data=_pack(APIKeyCallback, action="list")
             )
         ],
         [
             InlineKeyboardButton(
                 text="🔍 Проверить ключи",
-                callback_data=APIKeyCallback(action="validate").pack()
+                callback_data=_pack(APIKeyCallback, action="validate")
             )
         ],
         [
             InlineKeyboardButton(
                 text="🔙 Главное меню",
-                callback_data=MainMenuCallback(action="main").pack()
+                callback_data=_pack(MainMenuCallback, action="main")
             )
         ]
     ]
@@ -251,6 +353,20 @@ def get_api_keys_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+_API_KEYS_MENU = freeze_markup(_build_api_keys_menu())
+
+
+def get_api_keys_menu() -> InlineKeyboardMarkup:
+    """Get API keys menu keyboard."""
+    return _API_KEYS_MENU
+
+
+def _api_key_button_text(api_key: APIKey) -> str:
+    """Text of a key row in the API keys list."""
+    status_emoji = "🟢" if api_key.is_valid else "🔴"
+    return f"{status_emoji} {api_key.name} ({api_key.created_at.strftime('%d.%m.%Y')})"
+
+
 def get_api_keys_list_keyboard(api_keys: List[APIKey]) -> InlineKeyboardMarkup:
     """
     Get keyboard for API keys list.
@@ -261,24 +377,21 @@ def get_api_keys_list_keyboard(api_keys: List[APIKey]) -> InlineKeyboardMarkup:
     Returns:
         Keyboard with API keys list
     """
-    keyboard = []
-    
-    for api_key in api_keys:
-        status_emoji = "🟢" if api_key.is_valid else "🔴"
-        key_text = f"{status_emoji} {api_key.name} ({api_key.created_at.strftime('%d.%m.%Y')})"
-        
-        keyboard.append([
+    keyboard = [
+        [
             InlineKeyboardButton(
-                text=key_text,
-                callback_data=APIKeyCallback(action="manage", key_id=api_key.id).pack()
+                text=_api_key_button_text(api_key),
+                callback_data=_pack(APIKeyCallback, action="manage", key_id=api_key.id)
             )
-        ])
+        ]
+        for api_key in api_keys
+    ]
     
     # Navigation buttons
     keyboard.append([
         InlineKeyboardButton(
             text="🔙 Назад",
-            callback_data=APIKeyCallback(action="back").pack()
+            callback_data=_pack(APIKeyCallback, action="back")
         )
     ])
     
@@ -299,25 +412,25 @@ def get_api_key_management_keyboard(api_key: APIKey) -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="🔍 Проверить",
-                callback_data=APIKeyCallback(action="test", key_id=api_key.id).pack()
+                callback_data=_pack(APIKeyCallback, action="test", key_id=api_key.id)
             )
         ],
         [
             InlineKeyboardButton(
                 text="✏️ Переименовать",
-                callback_data=APIKeyCallback(action="rename", key_id=api_key.id).pack()
+                callback_data=_pack(APIKeyCallback, action="rename", key_id=api_key.id)
             )
         ],
         [
             InlineKeyboardButton(
                 text="🗑 Удалить",
-                callback_data=APIKeyCallback(action="delete", key_id=api_key.id).pack()
+                callback_data=_pack(APIKeyCallback, action="delete", key_id=api_key.id)
             )
         ],
         [
             InlineKeyboardButton(
                 text="🔙 К списку",
-                callback_data=APIKeyCallback(action="list").pack()
+                callback_data=_pack(APIKeyCallback, action="list")
             )
         ]
     ]
@@ -325,17 +438,17 @@ def get_api_key_management_keyboard(api_key: APIKey) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_supply_type_keyboard() -> InlineKeyboardMarkup:
-    """Get supply type selection keyboard."""
+def _build_supply_type_keyboard() -> InlineKeyboardMarkup:
+    """Build supply type selection keyboard."""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="📦 Короб",
-                callback_data=SettingsCallback(action="supply_type", value="box").pack()
+                callback_data=_pack(SettingsCallback, action="supply_type", value="box")
             ),
             InlineKeyboardButton(
                 text="🏗 Монопаллета",
-                callback_data=SettingsCallback(action="supply_type", value="mono_pallet").pack()
+                callback_data=_pack(SettingsCallback, action="supply_type", value="mono_pallet")
             )
         ]
     ]
@@ -343,17 +456,25 @@ def get_supply_type_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_delivery_type_keyboard() -> InlineKeyboardMarkup:
-    """Get delivery type selection keyboard."""
+_SUPPLY_TYPE_KB = freeze_markup(_build_supply_type_keyboard())
+
+
+def get_supply_type_keyboard() -> InlineKeyboardMarkup:
+    """Get supply type selection keyboard."""
+    return _SUPPLY_TYPE_KB
+
+
+def _build_delivery_type_keyboard() -> InlineKeyboardMarkup:
+    """Build delivery type selection keyboard."""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="🚚 Прямая",
-                callback_data=SettingsCallback(action="delivery_type", value="direct").pack()
+                callback_data=_pack(SettingsCallback, action="delivery_type", value="direct")
             ),
             InlineKeyboardButton(
                 text="🔄 Транзитная",
-                callback_data=SettingsCallback(action="delivery_type", value="transit").pack()
+                callback_data=_pack(SettingsCallback, action="delivery_type", value="transit")
             )
         ]
     ]
@@ -361,19 +482,27 @@ def get_delivery_type_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_monitoring_mode_keyboard() -> InlineKeyboardMarkup:
-    """Get monitoring mode selection keyboard."""
+_DELIVERY_TYPE_KB = freeze_markup(_build_delivery_type_keyboard())
+
+
+def get_delivery_type_keyboard() -> InlineKeyboardMarkup:
+    """Get delivery type selection keyboard."""
+    return _DELIVERY_TYPE_KB
+
+
+def _build_monitoring_mode_keyboard() -> InlineKeyboardMarkup:
+    """Build monitoring mode selection keyboard."""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="🔔 Только уведомления",
-                callback_data=SettingsCallback(action="mode", value="notification").pack()
+                callback_data=_pack(SettingsCallback, action="mode", value="notification")
             )
         ],
         [
             InlineKeyboardButton(
                 text="🤖 Автобронирование",
-                callback_data=SettingsCallback(action="mode", value="auto_booking").pack()
+                callback_data=_pack(SettingsCallback, action="mode", value="auto_booking")
             )
         ]
     ]
@@ -381,27 +510,35 @@ def get_monitoring_mode_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_coefficient_keyboard() -> InlineKeyboardMarkup:
-    """Get coefficient selection keyboard."""
+_MONITORING_MODE_KB = freeze_markup(_build_monitoring_mode_keyboard())
+
+
+def get_monitoring_mode_keyboard() -> InlineKeyboardMarkup:
+    """Get monitoring mode selection keyboard."""
+    return _MONITORING_MODE_KB
+
+
+def _build_coefficient_keyboard() -> InlineKeyboardMarkup:
+    """Build coefficient selection keyboard."""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="1.0x",
-                callback_data=SettingsCallback(action="coefficient", value="1.0").pack()
+                callback_data=_pack(SettingsCallback, action="coefficient", value="1.0")
             ),
             InlineKeyboardButton(
                 text="2.0x",
-                callback_data=SettingsCallback(action="coefficient", value="2.0").pack()
+                callback_data=_pack(SettingsCallback, action="coefficient", value="2.0")
             )
         ],
         [
             InlineKeyboardButton(
                 text="3.0x",
-                callback_data=SettingsCallback(action="coefficient", value="3.0").pack()
+                callback_data=_pack(SettingsCallback, action="coefficient", value="3.0")
             ),
             InlineKeyboardButton(
                 text="5.0x",
-                callback_data=SettingsCallback(action="coefficient", value="5.0").pack()
+                callback_data=_pack(SettingsCallback, action="coefficient", value="5.0")
             )
         ]
     ]
@@ -409,27 +546,35 @@ def get_coefficient_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def get_check_interval_keyboard() -> InlineKeyboardMarkup:
-    """Get check interval selection keyboard."""
+_COEFFICIENT_KB = freeze_markup(_build_coefficient_keyboard())
+
+
+def get_coefficient_keyboard() -> InlineKeyboardMarkup:
+    """Get coefficient selection keyboard."""
+    return _COEFFICIENT_KB
+
+
+def _build_check_interval_keyboard() -> InlineKeyboardMarkup:
+    """Build check interval selection keyboard."""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="30 сек",
-                callback_data=SettingsCallback(action="interval", value="30").pack()
+                callback_data=_pack(SettingsCallback, action="interval", value="30")
             ),
             InlineKeyboardButton(
                 text="1 мин",
-                callback_data=SettingsCallback(action="interval", value="60").pack()
+                callback_data=_pack(SettingsCallback, action="interval", value="60")
             )
         ],
         [
             InlineKeyboardButton(
                 text="5 мин",
-                callback_data=SettingsCallback(action="interval", value="300").pack()
+                callback_data=_pack(SettingsCallback, action="interval", value="300")
             ),
             InlineKeyboardButton(
                 text="10 мин",
-                callback_data=SettingsCallback(action="interval", value="600").pack()
+                callback_data=_pack(SettingsCallback, action="interval", value="600")
             )
         ]
     ]
@@ -437,10 +582,21 @@ def get_check_interval_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+_CHECK_INTERVAL_KB = freeze_markup(_build_check_interval_keyboard())
+
+
+def get_check_interval_keyboard() -> InlineKeyboardMarkup:
+    """Get check interval selection keyboard."""
+    return _CHECK_INTERVAL_KB
+
+
+@lru_cache(maxsize=256)
 def get_confirmation_keyboard(action: str, item_id: int = 0) -> InlineKeyboardMarkup:
     """
     Get confirmation keyboard for dangerous actions.
     
+    The keyboard is cached per (action, item_id) and must not be modified.
+    
     Args:
         action: Action to confirm
         item_id: Item ID for the action
@@ -466,6 +622,7 @@ def get_confirmation_keyboard(action: str, item_id: int = 0) -> InlineKeyboardMa
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@lru_cache(maxsize=1024)
 def get_pagination_keyboard(
     current_page: int,
     total_pages: int,
@@ -474,6 +631,8 @@ def get_pagination_keyboard(
     """
     Get pagination keyboard.
     
+    The keyboard is cached per arguments and must not be modified.
+    
     Args:
         current_page: Current page number (0-based)
         total_pages: Total number of pages
@@ -537,9 +696,9 @@ def get_back_button(callback_data: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def back_to_main_menu_keyboard() -> InlineKeyboardMarkup:
+def _build_back_to_main_menu_keyboard() -> InlineKeyboardMarkup:
     """
-    Get back to main menu keyboard.
+    Build back to main menu keyboard.
     
     Returns:
         Back to main menu keyboard
@@ -554,3 +713,11 @@ def back_to_main_menu_keyboard() -> InlineKeyboardMarkup:
     ]
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+_BACK_TO_MAIN_MENU_KB = freeze_markup(_build_back_to_main_menu_keyboard())
+
+
+def back_to_main_menu_keyboard() -> InlineKeyboardMarkup:
+    """Get back to main menu keyboard."""
+    return _BACK_TO_MAIN_MENU_KB
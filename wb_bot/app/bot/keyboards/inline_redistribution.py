@@ -5,49 +5,50 @@ Additional inline keyboards for redistribution functionality.
 from typing import List
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters.callback_data import CallbackData
+from pydantic import ConfigDict
+
+from ..utils.markup_cache import freeze_markup
 
 
 class RedistributionCallback(CallbackData, prefix="redistrib"):
     """Callback data for redistribution actions."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # start, cancel, back
 
 
 class WarehouseCallback(CallbackData, prefix="warehouse"):
     """Callback data for warehouse selection."""
+    model_config = ConfigDict(frozen=True)
+    
     action: str  # source, destination, select
     warehouse_id: str
 
 
-def get_redistribution_menu() -> InlineKeyboardMarkup:
+def _build_redistribution_menu() -> InlineKeyboardMarkup:
     """
-    Get redistribution menu keyboard.
+    Build redistribution menu keyboard.
     
     Returns:
         Redistribution menu keyboard
     """
     keyboard = [
-        [
-            InlineKeyboardButton(
-                text="🚀 Начать перераспределение",
-                callback_data=RedistributionCallback(action="start").pack()
-            )
-        ],
         [
             InlineKeyboardButton(
                 text="🚀 Открыть страницу перераспределения",
-                callback_data="open_redistribution_page"
+                callback_data=RedistributionCallback(action="start").pack()
             )
         ],
         [
             InlineKeyboardButton(
-                text="📋 Инструкция",
-                callback_data="redistribution_instructions"
+                text="📖 Инструкция",
+                callback_data=RedistributionCallback(action="help").pack()
             )
         ],
         [
             InlineKeyboardButton(
                 text="🏠 Главное меню",
-                callback_data="main_menu"
+                callback_data="back_to_main"
             )
         ]
     ]
@@ -55,6 +56,43 @@ def get_redistribution_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+_REDISTRIBUTION_MENU = freeze_markup(_build_redistribution_menu())
+
+
+def get_redistribution_menu() -> InlineKeyboardMarkup:
+    """Get redistribution menu keyboard."""
+    return _REDISTRIBUTION_MENU
+
+
+# Telegram limit for callback_data
+_MAX_CALLBACK_DATA_BYTES = 64
+
+
+def _warehouse_callback(prefix: str, action: str, warehouse_id) -> str:
+    """
+    WarehouseCallback data built directly from the prefix.
+    
+    Values that pack() would reject (not a string, contain the separator
+    or too long) still go through pack() to get its validation error.
+    """
+    if isinstance(warehouse_id, str) and WarehouseCallback.__separator__ not in warehouse_id:
+        payload = prefix + warehouse_id
+        if len(payload.encode()) <= _MAX_CALLBACK_DATA_BYTES:
+            return payload
+    return WarehouseCallback(action=action, warehouse_id=warehouse_id).pack()
+
+
+def _warehouse_button_text(warehouse: dict) -> str:
+    """Название склада с количеством товара."""
+    warehouse_name = warehouse.get('name', 'Неизвестный склад')
+    quantity = warehouse.get('quantity', 0)
+    quantity_full = warehouse.get('quantity_full', 0)
+    
+    if quantity_full > quantity:
+        return f"🏪 {warehouse_name} ({quantity}+{quantity_full-quantity} шт)"
+    return f"🏪 {warehouse_name} ({quantity} шт)"
+
+
 def create_warehouses_keyboard(warehouses: List[dict], action: str = "source") -> InlineKeyboardMarkup:
     """
     Create keyboard with warehouse buttons.
@@ -66,27 +104,17 @@ def create_warehouses_keyboard(warehouses: List[dict], action: str = "source") -
     Returns:
         Keyboard with warehouse buttons
     """
-    keyboard = []
-    
-    for warehouse in warehouses:
-        warehouse_name = warehouse.get('name', 'Неизвестный склад')
-        warehouse_id = warehouse.get('id', '')
-        quantity = warehouse.get('quantity', 0)
-        
-        # Добавляем количество к названию склада
-        quantity_full = warehouse.get('quantity_full', 0)
-        
-        if quantity_full > quantity:
-            button_text = f"🏪 {warehouse_name} ({quantity}+{quantity_full-quantity} шт)"
-        else:
-            button_text = f"🏪 {warehouse_name} ({quantity} шт)"
-        
-        keyboard.append([
+    # "warehouse:<action>:" is the same for every row, as in WarehouseCallback.pack()
+    prefix = WarehouseCallback(action=action, warehouse_id="").pack()
+    keyboard = [
+        [
             InlineKeyboardButton(
-                text=button_text,
-                callback_data=WarehouseCallback(action=action, warehouse_id=warehouse_id).pack()
+                text=_warehouse_button_text(warehouse),
+                callback_data=_warehouse_callback(prefix, action, warehouse.get('id', ''))
             )
-        ])
+        ]
+        for warehouse in warehouses
+    ]
     
     # Добавляем кнопку отмены
     keyboard.append([
@@ -5,7 +5,33 @@ This module defines all conversation states for complex bot interactions
 like creating monitoring tasks, adding API keys, etc.
 """
 
-from aiogram.fsm.state import State, StatesGroup
+from typing import Optional
+
+from aiogram.fsm.state import State as _BaseState, StatesGroup
+
+
+class State(_BaseState):
+    """
+    aiogram State with the full state name computed once.
+    
+    The base class formats "Group:name" on every .state access, and every
+    StateFilter check and FSM comparison reads it.
+    """
+    
+    def __init__(self, state: Optional[str] = None, group_name: Optional[str] = None) -> None:
+        super().__init__(state, group_name)
+        self._full_state: Optional[str] = None
+    
+    @property
+    def state(self) -> Optional[str]:
+        full_state = self._full_state
+        if full_state is None:
+            full_state = self._full_state = _BaseState.state.fget(self)
+        return full_state
+    
+    def set_parent(self, group: "type[StatesGroup]") -> None:
+        super().set_parent(group)
+        self._full_state = None
 
 
 class RegistrationStates(StatesGroup):
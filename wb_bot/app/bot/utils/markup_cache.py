@@ -0,0 +1,70 @@
+"""
+Сериализация статических клавиатур один раз на всю жизнь процесса.
+
+Перед каждым запросом aiogram превращает reply_markup в dict и затем в JSON.
+Для клавиатур, которые никогда не меняются (главное меню и т.п.), сессия
+бота запоминает готовую JSON-строку и подставляет ее в запрос.
+"""
+
+from typing import Dict, TypeVar
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import InlineKeyboardMarkup
+from aiohttp import FormData
+
+MarkupT = TypeVar("MarkupT", bound=InlineKeyboardMarkup)
+
+# id(markup) -> markup. Ссылка на объект держит его живым, поэтому id не переиспользуется
+_frozen_markups: Dict[int, InlineKeyboardMarkup] = {}
+
+
+def freeze_markup(markup: MarkupT) -> MarkupT:
+    """
+    Помечает клавиатуру как неизменяемую: ее JSON будет сериализован один раз.
+
+    После вызова клавиатуру нельзя изменять.
+    """
+    _frozen_markups[id(markup)] = markup
+    return markup
+
+
+class FrozenMarkupSession(AiohttpSession):
+    """AiohttpSession, которая подставляет кешированный JSON замороженных клавиатур."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._markup_json: Dict[int, str] = {}
+
+    def _frozen_markup_json(self, markup: InlineKeyboardMarkup, bot: Bot, files: Dict) -> str:
+        key = id(markup)
+        value = self._markup_json.get(key)
+        if value is None:
+            value = self._markup_json[key] = self.prepare_value(
+                markup.model_dump(warnings=False), bot=bot, files=files
+            )
+        return value
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[TelegramType]) -> FormData:
+        markup = getattr(method, "reply_markup", None)
+        if markup is None or id(markup) not in _frozen_markups:
+            return super().build_form_data(bot, method)
+
+        # То же, что AiohttpSession.build_form_data, но без повторной сериализации клавиатуры
+        form = FormData(quote_fields=False)
+        files: Dict = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", self._frozen_markup_json(markup, bot, files))
+        for key, value in files.items():
+            form.add_field(
+                key,
+                value.read(bot),
+                filename=value.filename or key,
+            )
+        return form
@@ -0,0 +1,42 @@
+"""
+Редактирование сообщений с учетом ограничения Telegram (~1 правка в секунду на сообщение).
+
+Повторная правка того же сообщения раньше чем через EDIT_INTERVAL секунд
+откладывается на оставшееся время, а не уходит сразу и не ловит flood control.
+
+RateLimitMiddleware ограничивает запросы на чат, но пропускает всплеск до
+chat_burst запросов подряд, и все они могут прийти в одно сообщение. Поэтому
+throttled_edit используется только там, где одно сообщение правится повторно
+(кнопки «Обновить», «Проверить оплату», цепочка «Создаю ссылку...» -> результат);
+одиночные правки идут напрямую через edit_text без лишней задержки.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+
+from aiogram.types import Message
+
+EDIT_INTERVAL = 0.8
+_MAX_TRACKED_MESSAGES = 10_000
+
+# (chat_id, message_id) -> время последней (или уже назначенной) правки
+_last_edit: "OrderedDict[Tuple[int, int], float]" = OrderedDict()
+
+
+async def throttled_edit(message: Message, text: str, **kwargs: Any) -> Any:
+    """Редактирует текст сообщения не чаще раза в EDIT_INTERVAL секунд."""
+    key = (message.chat.id, message.message_id)
+    now = time.monotonic()
+    last = _last_edit.get(key)
+    # Занимаем слот до ожидания, чтобы параллельные правки встали друг за другом
+    slot = now if last is None else max(now, last + EDIT_INTERVAL)
+    _last_edit[key] = slot
+    _last_edit.move_to_end(key)
+    while len(_last_edit) > _MAX_TRACKED_MESSAGES:
+        _last_edit.popitem(last=False)
+
+    if slot > now:
+        await asyncio.sleep(slot - now)
+    return await message.edit_text(text, **kwargs)
@@ -2,25 +2,67 @@
 Утилиты для отправки уведомлений пользователям.
 """
 
-from typing import Optional
+import asyncio
+from typing import Iterable, List, Optional
 from aiogram import Bot
 from ...config import settings
+from ...utils.logger import get_logger
+from .rate_limit import telegram_rate_limit
+
+logger = get_logger(__name__)
+
+# Общий экземпляр бота: соединения с api.telegram.org переиспользуются между уведомлениями
+_bot: Optional[Bot] = None
+
+
+def _get_bot() -> Bot:
+    """Возвращает общий экземпляр бота для уведомлений, создавая его при первом вызове."""
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=settings.telegram.bot_token)
+        # Тот же токен, что у основного бота: лимиты запросов общие
+        _bot.session.middleware(telegram_rate_limit)
+    return _bot
+
+
+async def close_notifications() -> None:
+    """Закрыть сессию бота уведомлений (при остановке приложения)."""
+    global _bot
+    if _bot is not None:
+        await _bot.session.close()
+        _bot = None
 
 
 async def notify_user(user_id: int, message: str, parse_mode: str = "HTML") -> bool:
     """Отправить уведомление пользователю."""
     try:
-        bot = Bot(token=settings.telegram.bot_token)
-        await bot.send_message(
+        await _get_bot().send_message(
             chat_id=user_id,
             text=message,
             parse_mode=parse_mode
         )
-        await bot.session.close()
         return True
     except Exception as e:
-        print(f"Failed to notify user {user_id}: {e}")
+        logger.warning("Failed to notify user %s: %s", user_id, e)
         return False
 
 
-
+async def notify_users(
+    user_ids: Iterable[int],
+    message: str,
+    parse_mode: str = "HTML",
+    concurrency: int = 25
+) -> List[bool]:
+    """
+    Отправить одно уведомление нескольким пользователям параллельно.
+    
+    Returns:
+        Результат отправки для каждого пользователя (в порядке user_ids)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _notify_one(user_id: int) -> bool:
+        async with semaphore:
+            return await notify_user(user_id, message, parse_mode)
+    
+    return await asyncio.gather(*(_notify_one(user_id) for user_id in user_ids))
@@ -0,0 +1,132 @@
+"""
+Ограничение частоты исходящих запросов к Telegram.
+
+Telegram допускает около 30 сообщений в секунду на бота и около одного в
+секунду на чат. При превышении он отвечает RetryAfter, и на это время
+блокируются запросы всех пользователей. Middleware сессии бота заранее
+выстраивает запросы в очередь: общий лимит на бота и отдельный на каждый чат.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods.base import TelegramType
+
+from ...utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.methods import Response, TelegramMethod
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Ведро токенов: rate запросов за per секунд с запасом capacity."""
+
+    def __init__(self, rate: float, per: float = 1.0, capacity: Optional[float] = None):
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        # Временное снижение скорости после RetryAfter: (rate, until)
+        self._throttle: Optional[Tuple[float, float]] = None
+
+    def _current_rate(self, now: float) -> float:
+        if self._throttle:
+            rate, until = self._throttle
+            if now < until:
+                return rate
+            self._throttle = None
+        return self.rate
+
+    def _refill(self, now: float) -> float:
+        """Пополняет ведро и возвращает текущую скорость."""
+        rate = self._current_rate(now)
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate / self.per)
+        self._updated = now
+        return rate
+
+    def throttle(self, rate: float, duration: float) -> None:
+        """Снижает скорость до rate на duration секунд."""
+        now = time.monotonic()
+        self._refill(now)
+        self._throttle = (rate, now + duration)
+        self._tokens = min(self._tokens, 0)
+
+    async def acquire(self) -> None:
+        """Ждет свободный токен и забирает его."""
+        async with self._lock:
+            while True:
+                rate = self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / rate)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: общий лимит на бота и лимит на каждый чат.
+
+    Ограничиваются только запросы, адресованные чату (отправка, редактирование,
+    удаление сообщений); getUpdates, answerCallbackQuery и т.п. идут без очереди.
+    """
+
+    def __init__(
+        self,
+        rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        backoff_rate: float = 20,
+        max_chats: int = 10_000
+    ):
+        self.bucket = TokenBucket(rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.backoff_rate = backoff_rate
+        self.max_chats = max_chats
+        self._chat_buckets: "OrderedDict[int | str, TokenBucket]" = OrderedDict()
+
+    def _chat_bucket(self, chat_id: "int | str") -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=self.chat_burst)
+            while len(self._chat_buckets) > self.max_chats:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: "TelegramMethod[TelegramType]",
+    ) -> "Response[TelegramType]":
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        await self._chat_bucket(chat_id).acquire()
+        await self.bucket.acquire()
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            logger.warning(
+                "⚠️ Telegram RetryAfter %s с, снижаю лимит до %s запросов/с",
+                e.retry_after, self.backoff_rate
+            )
+            self.bucket.throttle(self.backoff_rate, e.retry_after + 0.1)
+            raise
+
+
+# Общий экземпляр: лимиты Telegram считаются на токен бота, поэтому все
+# экземпляры Bot с этим токеном должны подключать именно его
+telegram_rate_limit = RateLimitMiddleware()
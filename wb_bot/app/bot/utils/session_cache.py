@@ -0,0 +1,53 @@
+"""
+Кеш данных сессии в памяти процесса.
+
+Частые действия (например, переключение чекбоксов) читают и пишут данные
+здесь, а в FSM хранилище они сбрасываются только при переходе к следующему шагу.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class SessionCache:
+    """Словари данных по chat_id с ограничением размера и временем жизни."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 1800):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Возвращает данные сессии или None, если их нет или они устарели."""
+        entry = self._data.get(chat_id)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del self._data[chat_id]
+            return None
+        self._data.move_to_end(chat_id)
+        return entry[1]
+
+    def update(self, chat_id: int, **values: Any) -> Dict[str, Any]:
+        """Обновляет данные сессии и продлевает время ее жизни."""
+        data = self.get(chat_id) or {}
+        data.update(values)
+        self._data[chat_id] = (time.monotonic() + self.ttl, data)
+        self._data.move_to_end(chat_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return data
+
+    def set(self, chat_id: int, key: str, value: Any) -> None:
+        """Устанавливает одно значение в данных сессии."""
+        self.update(chat_id, **{key: value})
+
+    def pop(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        """Удаляет данные сессии."""
+        entry = self._data.pop(chat_id, None)
+        return entry[1] if entry else None
+
+
+# Глобальный экземпляр кеша сессий
+session_cache = SessionCache()
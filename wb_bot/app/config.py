@@ -104,6 +104,10 @@ class MonitoringSettings(BaseSettings):
     max_concurrent_requests: int = Field(default=1000, description="Max concurrent requests")
     max_api_keys_per_user: int = Field(default=5, description="Max API keys per user")
     trial_bookings_limit: int = Field(default=2, description="Free trial bookings limit")
+    slow_callback_duration: float = Field(
+        default=0.1,
+        description="In debug mode, log event loop callbacks blocking longer than this (seconds)"
+    )
     
     # Coefficient thresholds
     default_max_coefficient: float = Field(default=2.0, description="Default max coefficient")
@@ -439,6 +439,24 @@ class BrowserSession(Base):
             self.session_valid = False
 
 
+class SuppliesSnapshot(Base):
+    """Последний полученный из API WB список поставок пользователя."""
+    __tablename__ = 'supplies_snapshots'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(BigInteger, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    api_key_hash = Column(String(64), nullable=False)  # Хеш API ключа (сам ключ не храним)
+    payload = Column(Text, nullable=False)  # JSON со списком поставок
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'api_key_hash', name='uq_supplies_snapshot_user_key'),
+    )
+    
+    def __repr__(self):
+        return f"<SuppliesSnapshot(user_id={self.user_id}, fetched_at={self.fetched_at})>"
+
+
 class PaymentStatus(PyEnum):
     """Payment status enumeration."""
     PENDING = "pending"  # ожидает оплаты
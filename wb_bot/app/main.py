@@ -13,6 +13,7 @@ from typing import AsyncGenerator
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
@@ -21,14 +22,23 @@ try:
     import redis.asyncio as aioredis
 except ImportError:
     import aioredis
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from .config import get_settings
 from .database import init_database, close_database
 from .services.monitoring import start_monitoring_service, stop_monitoring_service
 from .services.browser_manager import BrowserManager
 from .services.multi_booking_manager import MultiBookingManager
+from .services.wb_supplies_api import supplies_api_pool, wb_api_loop
+from .services.supplies_cache import supplies_cache
 from .utils.logger import setup_logging, get_logger
 from .bot.handlers import routers
+from .bot.utils.rate_limit import telegram_rate_limit
+from .bot.utils.notifications import close_notifications
+from .bot.utils.markup_cache import FrozenMarkupSession
 
 # Initialize logger
 setup_logging()
@@ -50,6 +60,21 @@ def get_multi_booking_manager() -> MultiBookingManager:
     return app_instance.multi_booking_manager
 
 
+# Размер пула соединений бота с Telegram (все запросы идут на один хост)
+BOT_SESSION_CONNECTION_LIMIT = 200
+
+
+def _create_bot_session() -> AiohttpSession:
+    """Создает HTTP сессию бота (с orjson для JSON, если он установлен)."""
+    if orjson is None:
+        return FrozenMarkupSession(limit=BOT_SESSION_CONNECTION_LIMIT)
+    return FrozenMarkupSession(
+        limit=BOT_SESSION_CONNECTION_LIMIT,
+        json_loads=orjson.loads,
+        json_dumps=lambda obj: orjson.dumps(obj).decode()
+    )
+
+
 class BotApplication:
     """
     Main bot application class.
@@ -86,16 +111,20 @@ class BotApplication:
             
             # Using PostgreSQL database only (no Redis)
             self.redis = None
+            supplies_cache.redis = self.redis
             
             # Initialize bot
             logger.info("Initializing bot...")
             self.bot = Bot(
                 token=self.settings.telegram.bot_token,
+                session=_create_bot_session(),
                 default=DefaultBotProperties(
                     parse_mode=ParseMode.HTML,
                     link_preview_is_disabled=True
                 )
             )
+            # Общий лимит исходящих запросов, чтобы не ловить RetryAfter на всех пользователей
+            self.bot.session.middleware(telegram_rate_limit)
             
             # Initialize dispatcher with appropriate storage
             if self.redis:
@@ -275,9 +304,10 @@ class BotApplication:
             
             await stop_monitoring_service()
         
-        # Close bot session
+        # Close bot sessions
         if self.bot:
             await self.bot.session.close()
+        await close_notifications()
         
         logger.info("Bot stopped")
     
@@ -291,6 +321,10 @@ class BotApplication:
         if self.redis:
             await self.redis.close()
         
+        # Close cached WB supplies API clients
+        await supplies_api_pool.close()
+        wb_api_loop.stop()
+        
         # Close database connections
         await close_database()
         
@@ -321,6 +355,13 @@ async def main() -> None:
         # Setup signal handlers
         setup_signal_handlers()
         
+        # In debug mode asyncio logs callbacks that block the event loop too long
+        if app.settings.debug:
+            loop = asyncio.get_running_loop()
+            loop.set_debug(True)
+            loop.slow_callback_duration = app.settings.monitoring.slow_callback_duration
+            logger.info(f"Event loop debug enabled (slow callback > {loop.slow_callback_duration}s)")
+        
         # Initialize application
         await app.initialize()
         
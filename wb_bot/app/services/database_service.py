@@ -6,7 +6,7 @@ validation, and business logic.
 """
 
 import logging
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 from typing import List, Optional, Dict, Any
 from sqlalchemy import select, update, delete, and_, or_
 from sqlalchemy.exc import SQLAlchemyError
@@ -14,7 +14,7 @@ from sqlalchemy.orm import selectinload
 
 from ..database.connection import get_session
 from ..database.models import (
-    User, APIKey, MonitoringTask, BookingResult, BrowserSession,
+    User, APIKey, MonitoringTask, BookingResult, BrowserSession, SuppliesSnapshot,
     SupplyType, DeliveryType, MonitoringMode, BookingStatus
 )
 from ..utils.encryption import encrypt_api_key, decrypt_api_key
@@ -622,6 +622,62 @@ class DatabaseService:
             logger.error(f"Unexpected error in add_api_key: {e}")
             return None
 
+    
+    # ==================== SUPPLIES SNAPSHOTS ====================
+    
+    async def get_supplies_snapshot(self, user_id: int, api_key_hash: str) -> Optional[SuppliesSnapshot]:
+        """Получить последний сохраненный список поставок пользователя."""
+        try:
+            async with get_session() as session:
+                stmt = select(SuppliesSnapshot).where(
+                    and_(
+                        SuppliesSnapshot.user_id == user_id,
+                        SuppliesSnapshot.api_key_hash == api_key_hash
+                    )
+                )
+                result = await session.execute(stmt)
+                return result.scalar_one_or_none()
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in get_supplies_snapshot: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error in get_supplies_snapshot: {e}")
+            return None
+    
+    async def save_supplies_snapshot(self, user_id: int, api_key_hash: str, payload: str) -> bool:
+        """Сохранить (или обновить) список поставок пользователя."""
+        try:
+            async with get_session() as session:
+                stmt = select(SuppliesSnapshot).where(
+                    and_(
+                        SuppliesSnapshot.user_id == user_id,
+                        SuppliesSnapshot.api_key_hash == api_key_hash
+                    )
+                )
+                result = await session.execute(stmt)
+                snapshot = result.scalar_one_or_none()
+                
+                if snapshot:
+                    snapshot.payload = payload
+                    snapshot.fetched_at = datetime.now(timezone.utc)
+                else:
+                    session.add(SuppliesSnapshot(
+                        user_id=user_id,
+                        api_key_hash=api_key_hash,
+                        payload=payload,
+                        fetched_at=datetime.now(timezone.utc)
+                    ))
+                
+                await session.commit()
+                return True
+                
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in save_supplies_snapshot: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error in save_supplies_snapshot: {e}")
+            return False
 
 # Global database service instance
 db_service = DatabaseService()
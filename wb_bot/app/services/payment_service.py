@@ -7,10 +7,12 @@ with proper error handling and transaction safety.
 
 import asyncio
 import json
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_DOWN
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from yookassa import Configuration, Payment as YooKassaPayment
 from yookassa.domain.response import PaymentResponse
@@ -34,8 +36,18 @@ class PaymentService:
     def __init__(self):
         """Initialize payment service."""
         self.settings = get_settings()
+        # Вызываются с user_id после каждого изменения баланса (сброс кешей)
+        self._balance_listeners: List[Callable[[int], None]] = []
         self._configure_yookassa()
     
+    def add_balance_listener(self, listener: Callable[[int], None]) -> None:
+        """Register a callback called with user_id whenever the balance changes."""
+        self._balance_listeners.append(listener)
+    
+    def _notify_balance_changed(self, user_id: int) -> None:
+        for listener in self._balance_listeners:
+            listener(user_id)
+    
     def _configure_yookassa(self):
         """Configure YooKassa SDK."""
         if self.settings.payment.yookassa_shop_id and self.settings.payment.yookassa_secret_key:
@@ -172,7 +184,8 @@ class PaymentService:
     async def check_payment_status(self, payment_id: str) -> Tuple[bool, Optional[PaymentStatus], Optional[str]]:
         """Check payment status in YooKassa."""
         try:
-            yookassa_payment = YooKassaPayment.find_one(payment_id)
+            # SDK YooKassa синхронный - не блокируем event loop
+            yookassa_payment = await asyncio.to_thread(YooKassaPayment.find_one, payment_id)
             
             if yookassa_payment.status == "succeeded":
                 return True, PaymentStatus.SUCCEEDED, None
@@ -187,6 +200,13 @@ class PaymentService:
             logger.error(f"Error checking payment status {payment_id}: {e}")
             return False, None, f"Ошибка проверки статуса: {str(e)}"
     
+    async def check_many(
+        self,
+        payment_ids: List[str]
+    ) -> List[Tuple[bool, Optional[PaymentStatus], Optional[str]]]:
+        """Check statuses of several payments concurrently."""
+        return await asyncio.gather(*(self.check_payment_status(pid) for pid in payment_ids))
+    
     async def process_successful_payment(self, payment_id: str) -> Tuple[bool, Optional[str]]:
         """Process successful payment and update user balance."""
         async with get_session() as session:
@@ -237,6 +257,7 @@ class PaymentService:
                 payment.paid_at = datetime.now(timezone.utc)
                 
                 await session.commit()
+                self._notify_balance_changed(payment.user_id)
                 
                 logger.info(f"Processed successful payment {payment_id}: user {payment.user_id} +{payment.amount} ₽")
                 return True, None
@@ -289,6 +310,7 @@ class PaymentService:
                 session.add(transaction)
                 
                 await session.commit()
+                self._notify_balance_changed(user_id)
                 
                 logger.info(f"Charged user {user_id} for booking: -{cost} ₽, balance: {user_balance.balance} ₽")
                 return True, None
@@ -320,6 +342,7 @@ class PaymentService:
                         "balance_before": t.balance_before,
                         "balance_after": t.balance_after,
                         "created_at": t.created_at.isoformat(),
+                        "date_str": t.created_at.strftime("%d.%m.%Y %H:%M"),
                         "payment_id": t.payment_id,
                         "booking_id": t.booking_id
                     }
@@ -348,5 +371,100 @@ class PaymentService:
             return []
 
 
+class PaymentStatusPoller:
+    """
+    Background polling of YooKassa statuses for payments awaiting confirmation.
+    
+    All watched payments are checked in one batch every `interval` seconds,
+    so user clicks on "check payment" read the latest known status instead
+    of each making its own request to YooKassa.
+    """
+    
+    def __init__(self, interval: float = 3.0, watch_ttl: float = 900.0):
+        """Initialize poller."""
+        self.interval = interval
+        self.watch_ttl = watch_ttl
+        # Set when the payment reaches a final status
+        self._events: Dict[str, asyncio.Event] = {}
+        self._results: Dict[str, Tuple[bool, Optional[PaymentStatus], Optional[str]]] = {}
+        # Payments still being polled: payment_id -> expiry
+        self._expires: Dict[str, float] = {}
+        # Payments with a final status, kept for later clicks: payment_id -> expiry (in expiry order)
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+    
+    def _drop_finished(self, now: float) -> None:
+        while self._finished:
+            pid, expires = next(iter(self._finished.items()))
+            if expires >= now:
+                break
+            del self._finished[pid]
+            self._events.pop(pid, None)
+            self._results.pop(pid, None)
+    
+    def watch(self, payment_id: str) -> asyncio.Event:
+        """Start (or prolong) polling of a payment."""
+        now = time.monotonic()
+        self._drop_finished(now)
+        if payment_id in self._finished:
+            # Final status already known, nothing to poll
+            return self._events[payment_id]
+        
+        self._expires[payment_id] = now + self.watch_ttl
+        event = self._events.get(payment_id)
+        if event is None:
+            event = self._events[payment_id] = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return event
+    
+    async def get_status(
+        self,
+        payment_id: str,
+        timeout: float = 2.0
+    ) -> Tuple[bool, Optional[PaymentStatus], Optional[str]]:
+        """Wait up to `timeout` seconds for a final status, then return the latest known one."""
+        event = self.watch(payment_id)
+        if not event.is_set():
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        
+        # Polling has not reached this payment yet: report it as pending
+        # instead of asking YooKassa on every click
+        return self._results.get(payment_id, (True, PaymentStatus.PENDING, "Платеж в обработке"))
+    
+    async def _run(self) -> None:
+        """Poll watched payments until none are left."""
+        while self._expires:
+            try:
+                now = time.monotonic()
+                for pid in [pid for pid, expires in self._expires.items() if expires < now]:
+                    del self._expires[pid]
+                    self._events.pop(pid, None)
+                    self._results.pop(pid, None)
+                
+                payment_ids = list(self._expires)
+                if payment_ids:
+                    results = await payment_service.check_many(payment_ids)
+                    for pid, result in zip(payment_ids, results):
+                        event = self._events.get(pid)
+                        if event is None:
+                            continue
+                        self._results[pid] = result
+                        success, status, _ = result
+                        if success and status != PaymentStatus.PENDING:
+                            # Final status: stop polling, keep the result for later clicks
+                            event.set()
+                            self._expires.pop(pid, None)
+                            self._finished[pid] = time.monotonic() + self.watch_ttl
+            except Exception as e:
+                logger.error(f"Error polling payment statuses: {e}")
+            
+            await asyncio.sleep(self.interval)
+
+
 # Global service instance
 payment_service = PaymentService()
+payment_status_poller = PaymentStatusPoller()
@@ -0,0 +1,250 @@
+"""
+Короткоживущий кеш списка поставок WB.
+
+Список поставок запрашивается при каждом открытии меню поставок и
+мультибронирования. Кеш хранит ответ API несколько десятков секунд, чтобы
+повторные нажатия не ходили в WB; явное обновление списка кеш обходит.
+Если подключен Redis - данные хранятся в нем, иначе в памяти процесса.
+
+Кроме того, последний ответ API сохраняется в БД (supplies_snapshots), чтобы
+после перезапуска бота список можно было показать сразу, до запроса к WB.
+
+Показанный пользователю список (view) хранится здесь же по ключу, а в FSM
+кладется только этот ключ: обработчики берут список или одну поставку из кеша.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    import aioredis
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+    _loads = json.loads
+
+from .database_service import db_service
+from .wb_supplies_api import supplies_api_pool
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SuppliesCache:
+    """Кеш поставок по пользователю и API ключу."""
+
+    # Поле хеша показанного списка, где лежит весь список целиком
+    _VIEW_LIST_FIELD = "__list__"
+
+    def __init__(
+        self,
+        ttl: int = 45,
+        max_local_entries: int = 1024,
+        snapshot_max_age: int = 300,
+        view_ttl: int = 1800
+    ):
+        self.ttl = ttl
+        self.snapshot_max_age = snapshot_max_age
+        self.max_local_entries = max_local_entries
+        self.view_ttl = view_ttl
+        self.redis: Optional[aioredis.Redis] = None
+        # Локальный кеш на случай работы без Redis: key -> (expires_at, supplies)
+        self._local: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        # Показанные списки: key -> (expires_at, supplies, {id: supply})
+        self._views: "OrderedDict[str, Tuple[float, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]" = OrderedDict()
+        # Фоновые записи снимков (цикл событий держит задачи только по слабой ссылке)
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    def _get_key_hash(self, api_key: str) -> str:
+        """Хеш API ключа (сам ключ не храним)."""
+        return hashlib.sha1(api_key.encode()).hexdigest()[:16]
+
+    def _get_cache_key(self, user_id: int, api_key: str) -> str:
+        """Ключ кеша: пользователь + хеш API ключа."""
+        return f"supplies:{user_id}:{self._get_key_hash(api_key)}"
+
+    async def _get(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Возвращает поставки из кеша, если они еще не устарели."""
+        if self.redis:
+            try:
+                cached_data = await self.redis.get(cache_key)
+                if cached_data:
+                    return _loads(cached_data)
+            except Exception as e:
+                logger.warning(f"Failed to get cached supplies: {e}")
+            return None
+
+        entry = self._local.get(cache_key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del self._local[cache_key]
+            return None
+        self._local.move_to_end(cache_key)
+        return entry[1]
+
+    async def _set(self, cache_key: str, supplies: List[Dict[str, Any]]) -> None:
+        """Сохраняет поставки в кеш на ttl секунд."""
+        if self.redis:
+            try:
+                await self.redis.setex(cache_key, self.ttl, _dumps(supplies))
+            except Exception as e:
+                logger.warning(f"Failed to cache supplies: {e}")
+            return
+
+        self._local[cache_key] = (time.monotonic() + self.ttl, supplies)
+        self._local.move_to_end(cache_key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    async def peek(self, user_id: int, api_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Возвращает поставки из кеша без обращения к API (None при промахе)."""
+        return await self._get(self._get_cache_key(user_id, api_key))
+
+    async def get_snapshot(self, user_id: int, api_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Возвращает сохраненный в БД список поставок, если он не старше snapshot_max_age."""
+        snapshot = await db_service.get_supplies_snapshot(user_id, self._get_key_hash(api_key))
+        if not snapshot or not snapshot.fetched_at:
+            return None
+
+        fetched_at = snapshot.fetched_at
+        if fetched_at.tzinfo is None:
+            fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+        if (datetime.now(timezone.utc) - fetched_at).total_seconds() > self.snapshot_max_age:
+            return None
+
+        try:
+            return _loads(snapshot.payload)
+        except ValueError as e:
+            logger.warning(f"Failed to parse supplies snapshot: {e}")
+            return None
+
+    async def get_supplies_cached(
+        self,
+        user_id: int,
+        api_key: str,
+        limit: int = 50,
+        force: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Получает поставки из кеша или из API WB.
+
+        Args:
+            user_id: ID пользователя Telegram
+            api_key: API ключ WB
+            limit: Максимальное количество поставок
+            force: Игнорировать кеш (явное обновление списка)
+
+        Returns:
+            Список поставок
+        """
+        cache_key = self._get_cache_key(user_id, api_key)
+
+        if not force:
+            supplies = await self._get(cache_key)
+            if supplies is not None:
+                return supplies
+
+        api_client = await supplies_api_pool.get(api_key)
+        supplies = await api_client.get_supplies(limit=limit)
+        await self.store(user_id, api_key, supplies)
+        return supplies
+
+    async def store(self, user_id: int, api_key: str, supplies: List[Dict[str, Any]]) -> None:
+        """Сохраняет полученные из API поставки в кеш и снимок в БД."""
+        await self._set(self._get_cache_key(user_id, api_key), supplies)
+        # Снимок в БД пишем в фоне, чтобы не задерживать ответ пользователю
+        payload = _dumps(supplies)
+        task = asyncio.create_task(db_service.save_supplies_snapshot(
+            user_id,
+            self._get_key_hash(api_key),
+            payload.decode() if isinstance(payload, bytes) else payload
+        ))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def put(self, user_id: int, supplies: List[Dict[str, Any]]) -> str:
+        """
+        Сохраняет показанный пользователю список поставок.
+
+        Returns:
+            Ключ, по которому список доступен через get/get_one
+        """
+        cache_key = f"supplies_view:{user_id}"
+        if self.redis:
+            try:
+                mapping = {str(supply.get("id")): _dumps(supply) for supply in supplies}
+                mapping[self._VIEW_LIST_FIELD] = _dumps(supplies)
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.delete(cache_key)
+                    pipe.hset(cache_key, mapping=mapping)
+                    pipe.expire(cache_key, self.view_ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache supplies view: {e}")
+            return cache_key
+
+        index = {str(supply.get("id")): supply for supply in supplies}
+        self._views[cache_key] = (time.monotonic() + self.view_ttl, supplies, index)
+        self._views.move_to_end(cache_key)
+        while len(self._views) > self.max_local_entries:
+            self._views.popitem(last=False)
+        return cache_key
+
+    def _get_view(self, cache_key: str) -> Optional[Tuple[float, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+        """Локальная запись показанного списка, если она не устарела."""
+        entry = self._views.get(cache_key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del self._views[cache_key]
+            return None
+        self._views.move_to_end(cache_key)
+        return entry
+
+    async def get(self, cache_key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Возвращает показанный список поставок по ключу (None, если его нет)."""
+        if not cache_key:
+            return None
+        if self.redis:
+            try:
+                cached_data = await self.redis.hget(cache_key, self._VIEW_LIST_FIELD)
+                if cached_data:
+                    return _loads(cached_data)
+            except Exception as e:
+                logger.warning(f"Failed to get supplies view: {e}")
+            return None
+
+        entry = self._get_view(cache_key)
+        return entry[1] if entry else None
+
+    async def get_one(self, cache_key: Optional[str], supply_id: str) -> Optional[Dict[str, Any]]:
+        """Возвращает одну поставку из показанного списка, не загружая весь список."""
+        if not cache_key:
+            return None
+        if self.redis:
+            try:
+                cached_data = await self.redis.hget(cache_key, supply_id)
+                if cached_data:
+                    return _loads(cached_data)
+            except Exception as e:
+                logger.warning(f"Failed to get supply from view: {e}")
+            return None
+
+        entry = self._get_view(cache_key)
+        return entry[2].get(supply_id) if entry else None
+
+
+# Глобальный экземпляр кеша
+supplies_cache = SuppliesCache()
@@ -2,8 +2,13 @@
 Клиент для работы с API поставок Wildberries
 """
 import asyncio
+import hashlib
+import ssl
+import threading
+from collections import OrderedDict
+
 import aiohttp
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 import json
 
@@ -15,31 +20,40 @@ logger = get_logger(__name__)
 class WBSuppliesAPIClient:
     """Клиент для работы с API поставок Wildberries."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[aiohttp.ClientSession] = None):
         self.api_key = api_key
         self.base_url = "https://supplies-api.wildberries.ru/api/v1"
-        self.session = None
+        # Общая сессия пула (если передана) не закрывается клиентом
+        self.session = session
+        self._owns_session = session is None
+        # Клиенты пула выполняют запросы в отдельном event loop (см. WBApiLoop)
+        self._use_wb_loop = False
+        self._auth_headers = {"Authorization": f"Bearer {self.api_key}"}
         
     async def __aenter__(self):
         """Создаем aiohttp сессию."""
-        self.session = aiohttp.ClientSession(
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "User-Agent": "WB-Supplies-Bot/1.0"
-            },
-            timeout=aiohttp.ClientTimeout(total=60)
-        )
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers={
+                    "Content-Type": "application/json",
+                    "User-Agent": "WB-Supplies-Bot/1.0"
+                },
+                timeout=aiohttp.ClientTimeout(total=60)
+            )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Закрываем aiohttp сессию."""
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
     
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
         """Выполняет HTTP запрос к API."""
+        if self._use_wb_loop and not wb_api_loop.is_current():
+            return await wb_api_loop.call(self._make_request(method, endpoint, **kwargs))
+        
         url = f"{self.base_url}{endpoint}"
+        kwargs.setdefault("headers", self._auth_headers)
         
         try:
             # Логируем параметры запроса для отладки
@@ -372,3 +386,154 @@ class WBSuppliesAPIClient:
         except Exception as e:
             logger.error(f"❌ Ошибка создания бронирования: {e}")
             return False
+
+
+async def preload_user_data(
+    api_client: WBSuppliesAPIClient,
+    limit: int = 50
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]]:
+    """
+    Параллельно загружает поставки и склады.
+    
+    Returns:
+        (поставки, склады); вместо данных, которые не удалось получить, - None
+    """
+    results = await asyncio.gather(
+        api_client.get_supplies(limit=limit),
+        api_client.get_warehouses(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"⚠️ Ошибка предзагрузки данных WB: {result}")
+    supplies, warehouses = [None if isinstance(result, Exception) else result for result in results]
+    return supplies, warehouses
+
+
+class WBApiLoop:
+    """
+    Отдельный event loop в фоновом потоке для HTTP запросов к API WB.
+    
+    Сетевые задержки и SSL рукопожатия WB не задерживают event loop,
+    который обрабатывает обновления Telegram.
+    """
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Возвращает loop потока WB API, запуская поток при первом обращении."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="wb-api-loop",
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+    
+    def is_current(self) -> bool:
+        """Выполняется ли текущий код внутри loop потока WB API."""
+        try:
+            return self._loop is not None and asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+    
+    async def call(self, coro):
+        """Выполняет корутину в loop потока WB API и возвращает результат."""
+        if self.is_current():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+    
+    def stop(self) -> None:
+        """Останавливает loop и поток WB API."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread:
+            thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+
+# Глобальный loop для запросов к API WB
+wb_api_loop = WBApiLoop()
+
+
+class WBSuppliesAPIClientPool:
+    """
+    Пул клиентов API поставок.
+    
+    Все клиенты работают через одну aiohttp сессию с общим пулом соединений,
+    поэтому TLS рукопожатие и DNS запросы не повторяются на каждый клик.
+    Сессия живет в loop потока WB API, туда же уходят запросы клиентов.
+    Клиенты кешируются по хешу API ключа (LRU).
+    """
+    
+    def __init__(self, max_clients: int = 256):
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, WBSuppliesAPIClient]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    @staticmethod
+    async def _create_session() -> aiohttp.ClientSession:
+        """Создает общую сессию (вызывается внутри loop потока WB API)."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                ttl_dns_cache=300,
+                ssl=ssl.create_default_context()
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": "WB-Supplies-Bot/1.0"
+            },
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, создавая ее при первом обращении."""
+        if self._session is None or self._session.closed:
+            session = await wb_api_loop.call(self._create_session())
+            # Пока сессия создавалась, ее мог создать параллельный вызов
+            if self._session is None or self._session.closed:
+                self._clients.clear()
+                self._session = session
+            else:
+                await wb_api_loop.call(session.close())
+        return self._session
+    
+    async def get(self, api_key: str) -> WBSuppliesAPIClient:
+        """Возвращает клиент для API ключа, создавая его при первом обращении."""
+        session = await self._get_session()
+        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        
+        client = self._clients.get(key_hash)
+        if client is None:
+            client = WBSuppliesAPIClient(api_key, session=session)
+            client._use_wb_loop = True
+            self._clients[key_hash] = client
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(key_hash)
+        return client
+    
+    async def close(self) -> None:
+        """Закрывает общую сессию (вызывается при остановке бота)."""
+        self._clients.clear()
+        if self._session and not self._session.closed:
+            await wb_api_loop.call(self._session.close())
+        self._session = None
+
+
+# Глобальный пул клиентов API поставок
+supplies_api_pool = WBSuppliesAPIClientPool()
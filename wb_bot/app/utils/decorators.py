@@ -7,6 +7,7 @@ like retry, rate limiting, and circuit breaker for robust API interactions.
 
 import asyncio
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Type, Union
@@ -362,3 +363,24 @@ def timeout(seconds: float):
         return wrapper
     
     return decorator
+
+
+@contextmanager
+def warn_if_slow(name: str, threshold: float = 0.02):
+    """
+    Log a warning when the wrapped synchronous block runs longer than threshold.
+    
+    Synchronous work inside async handlers blocks the event loop, so this is
+    meant for CPU-bound sections (text building, parsing) of hot handlers.
+    
+    Args:
+        name: Block name for the log message
+        threshold: Threshold in seconds
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if elapsed > threshold:
+            logger.warning(f"Slow block {name}: {elapsed * 1000:.1f} ms")
@@ -5,8 +5,10 @@ This module provides JSON-formatted logging with proper levels,
 filtering, and rotation for production environments.
 """
 
+import atexit
 import logging
 import logging.handlers
+import queue
 import sys
 from typing import Any, Dict, Optional
 from pathlib import Path
@@ -68,6 +70,46 @@ class TextFormatter(logging.Formatter):
         )
 
 
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps exc_info on the record.
+    
+    The stock prepare() renders the traceback into the message, which would
+    hide it from JSONFormatter's "exception" field.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Writes to stdout/files happen on the listener's thread, not on the event loop
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _start_queue_listener(handlers: list) -> logging.Handler:
+    """Start a listener thread for handlers and return the handler that feeds it."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+    else:
+        atexit.register(_stop_queue_listener)
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+    return LogQueueHandler(log_queue)
+
+
+def _stop_queue_listener() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
 def add_request_id(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
     """Add request ID to log events."""
     # This could be enhanced to track request IDs in async context
@@ -108,7 +150,7 @@ def setup_logging() -> None:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(log_level)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File handler if configured
     if settings.logging.file_path:
@@ -123,7 +165,10 @@ def setup_logging() -> None:
         )
         file_handler.setFormatter(formatter)
         file_handler.setLevel(log_level)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # Handlers run on a background thread; the root logger only enqueues records
+    root_logger.addHandler(_start_queue_listener(handlers))
     
     # Configure specific loggers
     configure_library_loggers()
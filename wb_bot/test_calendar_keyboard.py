@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Проверка календаря выбора дат: кешированная сетка месяца и переиспользование
+кнопок должны давать ту же клавиатуру, что и исходный get_calendar_keyboard.
+"""
+
+import asyncio
+import calendar
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к модулям
+sys.path.append(str(Path(__file__).parent))
+
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, User
+
+from app.bot.keyboards import calendar as calendar_module
+from app.bot.keyboards.calendar import (
+    CalendarCallback, CalendarFilter, DateRangeCalendar, parse_fast
+)
+
+_TODAY = date(2026, 10, 17)
+_USER_ID = 1
+
+
+@pytest.fixture(autouse=True)
+def _fixed_today(monkeypatch):
+    monkeypatch.setattr(calendar_module, "_today", lambda: _TODAY)
+
+
+def _reference_keyboard(
+    start_date, end_date, year: int, month: int, today: date = _TODAY
+) -> InlineKeyboardMarkup:
+    """Клавиатура в том виде, в каком ее строил исходный get_calendar_keyboard."""
+    cal = DateRangeCalendar
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                text=cal.EMOJI_PREV,
+                callback_data=CalendarCallback(action="nav_prev", year=year, month=month).pack()
+            ),
+            InlineKeyboardButton(text=f"{cal.MONTHS_RU[month - 1]} {year}", callback_data="ignore"),
+            InlineKeyboardButton(
+                text=cal.EMOJI_NEXT,
+                callback_data=CalendarCallback(action="nav_next", year=year, month=month).pack()
+            ),
+        ],
+        [InlineKeyboardButton(text=day, callback_data="ignore") for day in cal.WEEKDAYS_RU],
+    ]
+
+    for week in calendar.monthcalendar(year, month):
+        week_row = []
+        for day in week:
+            if day == 0:
+                week_row.append(InlineKeyboardButton(text=" ", callback_data="ignore"))
+                continue
+
+            current_date = date(year, month, day)
+            text = str(day)
+            if start_date == current_date:
+                text = f"{cal.EMOJI_SELECTED_START}{day}"
+            elif end_date == current_date:
+                text = f"{cal.EMOJI_SELECTED_END}{day}"
+            elif start_date and end_date and start_date < current_date < end_date:
+                text = f"{cal.EMOJI_IN_RANGE}{day}"
+            elif current_date == today:
+                text = f"{cal.EMOJI_TODAY}{day}"
+
+            if current_date < today:
+                week_row.append(InlineKeyboardButton(text=f"·{day}·", callback_data="ignore"))
+            else:
+                week_row.append(InlineKeyboardButton(
+                    text=text,
+                    callback_data=CalendarCallback(action="select", year=year, month=month, day=day).pack()
+                ))
+        keyboard.append(week_row)
+
+    if not start_date:
+        status_text = "📅 Выберите начальную дату"
+    elif not end_date:
+        status_text = f"📅 Начало: {start_date.strftime('%d.%m.%Y')}\n📅 Выберите конечную дату"
+    else:
+        days_diff = (end_date - start_date).days + 1
+        status_text = (f"📅 Период: {start_date.strftime('%d.%m.%Y')} - "
+                       f"{end_date.strftime('%d.%m.%Y')} ({days_diff} дн.)")
+    keyboard.append([InlineKeyboardButton(text=status_text, callback_data="ignore")])
+
+    action_row = []
+    if start_date and end_date:
+        action_row.append(InlineKeyboardButton(
+            text=f"{cal.EMOJI_CONFIRM} Подтвердить",
+            callback_data=CalendarCallback(action="confirm", year=year, month=month).pack()
+        ))
+    action_row.append(InlineKeyboardButton(
+        text=f"{cal.EMOJI_CANCEL} Отмена",
+        callback_data=CalendarCallback(action="cancel", year=year, month=month).pack()
+    ))
+    keyboard.append(action_row)
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def _assert_same(markup: InlineKeyboardMarkup, start_date, end_date, year: int, month: int) -> None:
+    expected = _reference_keyboard(start_date, end_date, year, month)
+    assert markup.model_dump() == expected.model_dump()
+
+
+def _select(cal: DateRangeCalendar, day: date) -> InlineKeyboardMarkup:
+    _, markup, _ = cal.handle_calendar_callback(
+        _USER_ID, CalendarCallback(action="select", year=day.year, month=day.month, day=day.day)
+    )
+    return markup
+
+
+@pytest.mark.parametrize("year, month", [(2026, 10), (2026, 9), (2026, 11), (2027, 2)])
+def test_empty_selection_matches_reference(year, month):
+    """Прошлые дни, сегодня и пустые ячейки - как в исходном календаре."""
+    markup = DateRangeCalendar().get_calendar_keyboard(_USER_ID, year, month)
+    _assert_same(markup, None, None, year, month)
+
+
+def test_selection_rerenders_match_reference():
+    """Выбор начала и конца периода: повторные рендеры того же месяца переиспользуют кнопки."""
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+
+    start, end = date(2026, 10, 20), date(2026, 10, 25)
+    _assert_same(_select(cal, start), start, None, 2026, 10)
+    _assert_same(_select(cal, end), start, end, 2026, 10)
+
+    # Новый выбор сбрасывает период
+    new_start = date(2026, 10, 17)
+    _assert_same(_select(cal, new_start), new_start, None, 2026, 10)
+
+
+def test_range_across_months_matches_reference():
+    """Период, переходящий на следующий месяц, и навигация по месяцам."""
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+    start, end = date(2026, 10, 30), date(2026, 11, 3)
+    _select(cal, start)
+
+    _, markup, _ = cal.handle_calendar_callback(
+        _USER_ID, CalendarCallback(action="nav_next", year=2026, month=10)
+    )
+    _assert_same(markup, start, None, 2026, 11)
+
+    _assert_same(_select(cal, end), start, end, 2026, 11)
+
+    _, markup, _ = cal.handle_calendar_callback(
+        _USER_ID, CalendarCallback(action="nav_prev", year=2026, month=11)
+    )
+    _assert_same(markup, start, end, 2026, 10)
+
+
+def test_selected_past_day_stays_disabled():
+    """Выбранная дата в прошлом показывается неактивной, как раньше."""
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+    selection = cal.get_selection_state(_USER_ID)
+    selection.start_date, selection.end_date = date(2026, 10, 10), date(2026, 10, 20)
+
+    markup = cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+    _assert_same(markup, selection.start_date, selection.end_date, 2026, 10)
+
+
+def test_day_change_rebuilds_grid(monkeypatch):
+    """После смены дня кешированная сетка не используется: сегодняшний день сдвигается."""
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+
+    tomorrow = date(2026, 10, 18)
+    monkeypatch.setattr(calendar_module, "_today", lambda: tomorrow)
+    markup = cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+    assert markup.model_dump() == _reference_keyboard(None, None, 2026, 10, today=tomorrow).model_dump()
+
+
+def test_confirm_returns_dates_and_clears_state():
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(_USER_ID, 2026, 10)
+    start, end = date(2026, 10, 20), date(2026, 10, 25)
+    _select(cal, start)
+    _select(cal, end)
+
+    _, markup, dates = cal.handle_calendar_callback(
+        _USER_ID, CalendarCallback(action="confirm", year=2026, month=10)
+    )
+    assert markup is None
+    assert dates == (start, end)
+    assert cal.get_selection_state(_USER_ID) is None
+    assert _USER_ID not in cal._last_kb
+
+
+def test_stale_selections_are_swept():
+    """Брошенные выборы удаляются не раньше SELECTION_TTL."""
+    cal = DateRangeCalendar()
+    cal.get_calendar_keyboard(1, 2026, 10)
+    cal.get_calendar_keyboard(2, 2026, 10)
+    fresh_at = cal.selections[2].updated_at
+    cal.selections[1].updated_at = fresh_at - cal.SELECTION_TTL - 1
+
+    cal._next_sweep = 0.0
+    cal._sweep_stale_selections(fresh_at)
+    assert list(cal.selections) == [2]
+    assert list(cal._last_kb) == [2]
+
+
+@pytest.mark.parametrize("callback_data", [
+    CalendarCallback(action="select", year=2026, month=10, day=17),
+    CalendarCallback(action="nav_prev", year=2026, month=1),
+    CalendarCallback(action="confirm", year=2027, month=12),
+])
+def test_parse_fast_matches_unpack(callback_data):
+    packed = callback_data.pack()
+    unpacked = CalendarCallback.unpack(packed)
+    assert parse_fast(packed) == (unpacked.action, unpacked.year, unpacked.month, unpacked.day)
+
+
+@pytest.mark.parametrize("data", ["ignore", "cal:select:2026:10", "cal:select:x:10:1", "calx:a:1:2:3"])
+def test_parse_fast_rejects_foreign_data(data):
+    assert parse_fast(data) is None
+
+
+def test_calendar_filter():
+    def query(data: str) -> CallbackQuery:
+        return CallbackQuery(
+            id="1", chat_instance="1", data=data,
+            from_user=User(id=_USER_ID, is_bot=False, first_name="Test")
+        )
+
+    result = asyncio.run(CalendarFilter()(query("cal:select:2026:10:17")))
+    assert result["callback_data"].model_dump() == CalendarCallback(
+        action="select", year=2026, month=10, day=17
+    ).model_dump()
+    assert asyncio.run(CalendarFilter()(query("ignore"))) is False
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Проверка FrozenMarkupSession: запрос с замороженной клавиатурой должен
+совпадать с тем, что собирает обычная AiohttpSession aiogram.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к модулям
+sys.path.append(str(Path(__file__).parent))
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.bot.keyboards.inline import get_main_menu
+from app.bot.keyboards.inline_redistribution import get_redistribution_menu
+from app.bot.utils.markup_cache import FrozenMarkupSession, freeze_markup
+
+_TOKEN = "42:TEST"
+
+
+def _fields(session: AiohttpSession, method) -> dict:
+    """Поля multipart-формы запроса: имя -> значение."""
+    form = session.build_form_data(Bot(_TOKEN, session=session), method)
+    return {options["name"]: value for options, _, value in form._fields}
+
+
+def _methods(markup: InlineKeyboardMarkup) -> list:
+    return [
+        SendMessage(chat_id=1, text="<b>hi</b>", parse_mode="HTML", reply_markup=markup),
+        EditMessageText(chat_id=1, message_id=2, text="edit", reply_markup=markup),
+    ]
+
+
+_PLAIN_MARKUP = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="plain", callback_data="plain")]
+])
+
+
+@pytest.mark.parametrize("markup", [get_main_menu(), get_redistribution_menu(), _PLAIN_MARKUP])
+def test_form_fields_match_aiohttp_session(markup):
+    """Замороженная и обычная клавиатуры дают те же поля, что и AiohttpSession."""
+    frozen_session = FrozenMarkupSession()
+    plain_session = AiohttpSession()
+    for method in _methods(markup):
+        expected = _fields(plain_session, method)
+        assert _fields(frozen_session, method) == expected
+        # Второй запрос берет JSON из кеша сессии
+        assert _fields(frozen_session, method) == expected
+
+
+def test_frozen_markup_json_is_cached():
+    """JSON замороженной клавиатуры сериализуется один раз на сессию."""
+    markup = freeze_markup(InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="frozen", callback_data="frozen")]
+    ]))
+    session = FrozenMarkupSession()
+    for method in _methods(markup):
+        _fields(session, method)
+    assert list(session._markup_json) == [id(markup)]
+
+    # Обычная клавиатура в кеш не попадает
+    for method in _methods(_PLAIN_MARKUP):
+        _fields(session, method)
+    assert list(session._markup_json) == [id(markup)]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Проверка компактных callback_data поставок: кодирование ID и прием
+кнопок старого формата supply_select:/multi_toggle:.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к модулям
+sys.path.append(str(Path(__file__).parent))
+
+from aiogram.types import CallbackQuery, User
+
+from app.bot.keyboards.inline import (
+    MultiToggleCallback, SupplySelectCallback, decode_supply_id, encode_supply_id
+)
+from app.bot.handlers import supplies_management
+from app.bot.handlers.supplies_management import (
+    _supply_id_from_callback, select_supply, toggle_supply_selection
+)
+
+
+@pytest.mark.parametrize("supply_id", [
+    0, 7, 35, 36, 123456, 38921764, "38921764", 2 ** 63,
+    "WB-GI-12345", "007", "-5", "", "a_b",
+])
+def test_encode_decode_round_trip(supply_id):
+    token = encode_supply_id(supply_id)
+    assert decode_supply_id(token) == str(supply_id)
+    # Упакованная кнопка влезает в лимит Telegram и распаковывается обратно
+    packed = SupplySelectCallback(sid=token).pack()
+    assert len(packed.encode()) <= 64
+    assert decode_supply_id(SupplySelectCallback.unpack(packed).sid) == str(supply_id)
+
+
+def test_numeric_ids_are_base36():
+    token = encode_supply_id(38921764)
+    assert int(token, 36) == 38921764
+    assert len(token) < len("38921764")
+
+
+def _query(data: str) -> CallbackQuery:
+    return CallbackQuery(
+        id="1", chat_instance="1", data=data,
+        from_user=User(id=1, is_bot=False, first_name="Test")
+    )
+
+
+def _accepted_by(callback, data: str) -> bool:
+    """Принимает ли callback_data хотя бы одна регистрация обработчика в роутере."""
+    handlers = [
+        handler for handler in supplies_management.router.callback_query.handlers
+        if handler.callback is callback
+    ]
+    assert handlers, f"{callback.__name__} is not registered"
+
+    async def check():
+        for handler in handlers:
+            passed, _ = await handler.check(_query(data))
+            if passed:
+                return True
+        return False
+
+    return asyncio.run(check())
+
+
+@pytest.mark.parametrize("handler, legacy_prefix, callback_cls", [
+    (select_supply, "supply_select", SupplySelectCallback),
+    (toggle_supply_selection, "multi_toggle", MultiToggleCallback),
+])
+@pytest.mark.parametrize("supply_id", ["38921764", "WB-GI-12345"])
+def test_handlers_accept_compact_and_legacy_data(handler, legacy_prefix, callback_cls, supply_id):
+    legacy = f"{legacy_prefix}:{supply_id}"
+    compact = callback_cls(sid=encode_supply_id(supply_id)).pack()
+
+    for data in (legacy, compact):
+        assert _accepted_by(handler, data)
+        assert _supply_id_from_callback(data) == supply_id
+
+
+def test_handlers_ignore_other_prefixes():
+    assert not _accepted_by(select_supply, "multi_toggle:1")
+    assert not _accepted_by(toggle_supply_selection, "supply_select:1")
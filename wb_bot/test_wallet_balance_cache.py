@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Проверка кеша баланса кошелька: параллельные запросы баланса одного
+пользователя идут в БД одним запросом, ошибка не оставляет зависший запрос.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к модулям
+sys.path.append(str(Path(__file__).parent))
+
+from app.bot.handlers import wallet
+from app.services.payment_service import payment_service
+
+_USER_ID = 424242
+
+
+@pytest.fixture(autouse=True)
+def _clean_balance_cache():
+    wallet._balance_cache.clear()
+    wallet._balance_inflight.clear()
+    yield
+    wallet._balance_cache.clear()
+    wallet._balance_inflight.clear()
+
+
+def test_concurrent_callers_share_one_fetch(monkeypatch):
+    """Два одновременных запроса баланса - один вызов get_user_balance_info."""
+    calls = []
+
+    async def fake_balance_info(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"balance": 100.0}
+
+    monkeypatch.setattr(payment_service, "get_user_balance_info", fake_balance_info)
+
+    async def scenario():
+        return await asyncio.gather(
+            wallet._cached_balance(_USER_ID),
+            wallet._cached_balance(_USER_ID),
+        )
+
+    first, second = asyncio.run(scenario())
+    assert calls == [_USER_ID]
+    assert first == second == {"balance": 100.0}
+    assert _USER_ID not in wallet._balance_inflight
+
+
+def test_failed_fetch_leaves_no_inflight_entry(monkeypatch):
+    """Ошибка БД доходит до всех ожидающих и не оставляет запись в _balance_inflight."""
+    calls = []
+
+    async def failing_balance_info(user_id):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db is down")
+
+    monkeypatch.setattr(payment_service, "get_user_balance_info", failing_balance_info)
+
+    async def scenario():
+        return await asyncio.gather(
+            wallet._cached_balance(_USER_ID),
+            wallet._cached_balance(_USER_ID),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert calls == [_USER_ID]
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert _USER_ID not in wallet._balance_inflight
+    assert _USER_ID not in wallet._balance_cache
+
+
+def test_balance_change_drops_cached_balance(monkeypatch):
+    """Списание или пополнение через payment_service сбрасывает кеш баланса."""
+    balances = iter([{"balance": 100.0}, {"balance": 90.0}])
+
+    async def fake_balance_info(user_id):
+        return next(balances)
+
+    monkeypatch.setattr(payment_service, "get_user_balance_info", fake_balance_info)
+
+    async def scenario():
+        before = await wallet._cached_balance(_USER_ID)
+        payment_service._notify_balance_changed(_USER_ID)
+        return before, await wallet._cached_balance(_USER_ID)
+
+    assert asyncio.run(scenario()) == ({"balance": 100.0}, {"balance": 90.0})